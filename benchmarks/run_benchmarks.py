@@ -0,0 +1,303 @@
+import sys
+import os
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import platform
+import time
+import numpy as np
+from matplotlib.figure import Figure
+from scipy.sparse.csgraph import connected_components
+
+from src.qgu_core import QGU_System
+from src.simulation import Simulation
+from src.raytrace import PhotonTracer
+from src.chemistry import FlowField, diatomic
+from src.mind import MindNetwork
+
+SIZES = [100, 1000, 10000, 100000]
+REPEAT = 3                 # timed runs per size (the fastest one is kept)
+MIN_RUN_SECONDS = 0.05     # fast kernels are called repeatedly for at least this long
+MAX_SECONDS = 20.0         # skip a size whose predicted time exceeds this
+THRESHOLD = 0.25           # compare mode: flag slowdowns beyond +25%
+NUMBER_DENSITY = 0.05      # entities per unit volume (box grows with N)
+DENSITY_RADIUS = 5.0
+QUERIES = 1000             # per-entity density / gradient calls per run
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+BASELINE = os.path.join(BASELINE_DIR, 'baseline.json')
+FIGURE = os.path.join('figures', 'benchmark_scaling.png')
+
+BENCHMARKS = {}
+
+def benchmark(name, description, complexity=1.0):
+    """
+    Registers a benchmark. The decorated function takes (n, rng), does all
+    the setup and returns the callable that gets timed. `complexity` is the
+    expected exponent of N, used to predict (and skip) runs over budget.
+    """
+    def register(setup):
+        BENCHMARKS[name] = {'setup': setup, 'description': description,
+                            'complexity': complexity}
+        return setup
+    return register
+
+def make_system(n, rng, periodic=False):
+    """N entities uniformly in a box holding NUMBER_DENSITY entities per unit volume."""
+    half = 0.5 * (n / NUMBER_DENSITY) ** (1 / 3)
+    system = QGU_System(n, space_size=half, periodic=periodic)
+    system.add_entities(rng.uniform(-half, half, (n, 3)), mass=rng.uniform(1, 5, n))
+    return system
+
+# ----------------------------------------------------------------------
+# Kernels
+# ----------------------------------------------------------------------
+@benchmark('local_density', f"_get_local_density for {QUERIES} entities", complexity=0.3)
+def bench_local_density(n, rng):
+    system = make_system(n, rng)
+    entities = [system.entities[i % n] for i in range(QUERIES)]
+    system.neighbor_index(DENSITY_RADIUS)
+
+    def run():
+        for entity in entities:
+            system._get_local_density(entity, DENSITY_RADIUS)
+    return run
+
+@benchmark('local_density_cached', f"_get_local_density for {QUERIES} entities, density grid cache",
+           complexity=0.3)
+def bench_local_density_cached(n, rng):
+    system = make_system(n, rng)
+    system.set_density_cache()
+    entities = [system.entities[i % n] for i in range(QUERIES)]
+    system.density(np.arange(1), DENSITY_RADIUS)   # deposits every entity once
+
+    def run():
+        for entity in entities:
+            system._get_local_density(entity, DENSITY_RADIUS)
+    return run
+
+@benchmark('gradient_acceleration', f"calculate_gradient_acceleration for {QUERIES} entities",
+           complexity=0.3)
+def bench_gradient_acceleration(n, rng):
+    system = make_system(n, rng)
+    entities = [system.entities[i % n] for i in range(QUERIES)]
+    system.neighbor_index(DENSITY_RADIUS)
+
+    def run():
+        for entity in entities:
+            system.calculate_gradient_acceleration(entity, DENSITY_RADIUS)
+    return run
+
+@benchmark('density_gradient', "batched density_gradient over all N entities")
+def bench_density_gradient(n, rng):
+    system = make_system(n, rng)
+    rows = np.arange(n)
+    return lambda: system.density_gradient(rows, DENSITY_RADIUS)
+
+def _nbody(n, rng, backend, periodic=False, **options):
+    sim = Simulation(make_system(n, rng, periodic), dt=0.05, density_radius=DENSITY_RADIUS,
+                     force_backend=backend, **options)
+    sim.step()
+    return sim.step
+
+@benchmark('nbody_direct', "Simulation.step, direct-sum gravity", complexity=2.0)
+def bench_nbody_direct(n, rng):
+    return _nbody(n, rng, 'direct')
+
+@benchmark('nbody_barnes_hut', "Simulation.step, Barnes-Hut gravity", complexity=1.2)
+def bench_nbody_barnes_hut(n, rng):
+    return _nbody(n, rng, 'barnes_hut')
+
+@benchmark('nbody_particle_mesh', "Simulation.step, particle-mesh gravity")
+def bench_nbody_particle_mesh(n, rng):
+    return _nbody(n, rng, 'particle_mesh')
+
+@benchmark('nbody_periodic_mesh', "Simulation.step, particle-mesh gravity in a periodic box")
+def bench_nbody_periodic_mesh(n, rng):
+    return _nbody(n, rng, 'particle_mesh', periodic=True)
+
+@benchmark('ray_step', "PhotonTracer.step with N rays in flight")
+def bench_ray_step(n, rng):
+    tracer = PhotonTracer(np.linspace(-4, 4, n))
+    tracer.run(10)
+    return tracer.step
+
+@benchmark('chemistry_energy', "FlowField.energy of N diatomic configurations (1D grid)")
+def bench_chemistry_energy(n, rng):
+    field = FlowField([np.linspace(-10, 10, 200)], gradient='fd', dtype=np.float64)
+    positions = diatomic(rng.uniform(0.5, 5.0, n))
+    return lambda: field.energy(positions)
+
+def _connected_brain(n, rng):
+    """Random mind network and the neurons of its largest connected component."""
+    brain = MindNetwork.random(n, mean_degree=6, seed=int(rng.integers(1 << 31)))
+    _, labels = connected_components(brain.matrix(), directed=False)
+    return brain, np.flatnonzero(labels == np.bincount(labels).argmax())
+
+@benchmark('mind_train', "MindNetwork.train, 50 signals to a new target on N neurons")
+def bench_mind_train(n, rng):
+    brain, neurons = _connected_brain(n, rng)
+    # a new target every call, so the cached path of the previous call cannot be reused
+    return lambda: brain.train(int(neurons[0]), int(rng.choice(neurons[1:])), 50)
+
+@benchmark('mind_train_batch', "MindNetwork.train_batch, 20 memories x 1 epoch on N neurons")
+def bench_mind_train_batch(n, rng):
+    brain, neurons = _connected_brain(n, rng)
+    sources, targets = rng.choice(neurons, (2, 20))
+    return lambda: brain.train_batch(sources, targets)
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+def time_call(setup, n, repeat, seed):
+    """
+    Seconds per call: fastest of `repeat` runs, each on a fresh setup (not
+    timed) calling the kernel until MIN_RUN_SECONDS have passed.
+    """
+    best = np.inf
+    for r in range(repeat):
+        run = setup(n, np.random.default_rng([seed, n, r]))
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_RUN_SECONDS:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+def scaling_exponent(sizes, seconds):
+    """Least-squares slope of log(time) against log(N) over the measured sizes."""
+    points = [(n, s) for n, s in zip(sizes, seconds) if s is not None and s > 0]
+    if len(points) < 2:
+        return None
+    n, s = np.log(np.array(points)).T
+    return float(np.polyfit(n, s, 1)[0])
+
+def run_suite(names=None, sizes=SIZES, repeat=REPEAT, max_seconds=MAX_SECONDS, seed=0):
+    """
+    Times every benchmark over `sizes`. A size is skipped (None) when the
+    previous one, scaled by the expected complexity, predicts more than
+    `max_seconds` per run.
+    Returns: results dict (JSON-ready)
+    """
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'repeat': repeat,
+        },
+        'benchmarks': {},
+    }
+    for name in names or BENCHMARKS:
+        spec = BENCHMARKS[name]
+        seconds, previous = [], None
+        print(f"⏱️  {name}: {spec['description']}")
+        for n in sizes:
+            if previous is not None and previous[1] * (n / previous[0]) ** spec['complexity'] > max_seconds:
+                seconds.append(None)
+                print(f"   N={n:>7}: skipped (over {max_seconds:.0f}s budget)")
+                continue
+            elapsed = time_call(spec['setup'], n, repeat, seed)
+            seconds.append(elapsed)
+            previous = (n, elapsed)
+            print(f"   N={n:>7}: {elapsed * 1e3:10.2f} ms")
+        exponent = scaling_exponent(sizes, seconds)
+        if exponent is not None:
+            print(f"   scaling ~ N^{exponent:.2f}")
+        results['benchmarks'][name] = {'description': spec['description'], 'sizes': list(sizes),
+                                       'seconds': seconds, 'exponent': exponent}
+    return results
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Ratio new / baseline for every (benchmark, N) timed in both.
+    Returns: list of (name, n, baseline seconds, new seconds, ratio, regressed)
+    """
+    rows = []
+    for name, new in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if old is None:
+            continue
+        before = dict(zip(old['sizes'], old['seconds']))
+        for n, after in zip(new['sizes'], new['seconds']):
+            if after is None or before.get(n) is None:
+                continue
+            ratio = after / before[n]
+            rows.append((name, n, before[n], after, ratio, ratio > 1 + threshold))
+    return rows
+
+def plot_scaling(results, path=FIGURE):
+    """Log-log time vs N for every benchmark (headless, Agg)."""
+    fig = Figure(figsize=(10, 7))
+    ax = fig.add_subplot()
+    for name, data in results['benchmarks'].items():
+        points = [(n, s) for n, s in zip(data['sizes'], data['seconds']) if s is not None]
+        if points:
+            n, s = zip(*points)
+            ax.loglog(n, s, 'o-', label=name)
+    ax.set_xlabel('N')
+    ax.set_ylabel('seconds per run')
+    ax.set_title('QGU KERNEL SCALING')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(fontsize=8)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fig.savefig(path, dpi=100)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QGU kernel scaling benchmarks")
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default all: {', '.join(BENCHMARKS)})")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--max-seconds', type=float, default=MAX_SECONDS)
+    parser.add_argument('--save', nargs='?', const=BASELINE, metavar='PATH',
+                        help=f"store results as a JSON baseline (default {BASELINE})")
+    parser.add_argument('--compare', nargs='?', const=BASELINE, metavar='PATH',
+                        help="compare against a stored baseline and flag regressions")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="relative slowdown counted as a regression")
+    parser.add_argument('--plot', nargs='?', const=FIGURE, metavar='PATH',
+                        help="save log-log scaling curves")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    print("🚀 QGU BENCHMARKS...")
+    results = run_suite(args.names, args.sizes, args.repeat, args.max_seconds)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or '.', exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline saved: {args.save}")
+
+    if args.plot:
+        print(f"📸 Scaling curves: {plot_scaling(results, args.plot)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n📊 Against {args.compare} (threshold +{args.threshold:.0%}):")
+        for name, n, before, after, ratio, regressed in rows:
+            flag = '❌ REGRESSION' if regressed else '✅'
+            print(f"   {name:<22} N={n:>7}: {before * 1e3:9.2f} -> {after * 1e3:9.2f} ms "
+                  f"(x{ratio:.2f}) {flag}")
+        regressions = sum(row[-1] for row in rows)
+        print(f"   {regressions} regression(s) in {len(rows)} comparisons")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
-import os
+from src.helix import helix_energy, optimize_helix
 
 def run_helix_proof():
     print("🧬 INITIALIZING DNA FLOW TEST...")
@@ -14,55 +18,24 @@ def run_helix_proof():
     
     # We will sweep the twist angle from 0 (Ladder) to 180 degrees
     test_angles = np.linspace(0, 100, 100)
-    stability_scores = []
 
-    # QGU Interaction Function (Modified for flow shadowing)
-    # If atoms are directly on top of each other (Angle 0), Repulsion is HIGH.
-    # If they are staggered (Angle > 0), Repulsion drops.
-    def calculate_interlayer_stress(angle_deg):
-        angle_rad = np.deg2rad(angle_deg)
-        stress = 0
-        
-        # Simulate interaction between Layer i and Layer i+1
-        # In QGU, flow travels vertically. 
-        # Max Stress = Perfectly Aligned (0 degree difference)
-        # Min Stress = Perfectly Staggered (Optimized Flow)
-        
-        # We model stress as a function of the 'overlap' between stacked bases.
-        # Simple heuristic: Stress drops as molecules move away from "eclipsed" position.
-        # But we also need 'cohesion' (they can't be too far apart radially).
-        
-        # Let's look at the distance between Strand A(i) and Strand A(i+1)
-        # Pos A(i)   = [r, 0, 0]
-        # Pos A(i+1) = [r*cos(theta), r*sin(theta), h]
-        
-        dx = radius * (1 - np.cos(angle_rad))
-        dy = radius * (np.sin(angle_rad))
-        dz = vertical_spacing
-        
-        dist_sq = dx**2 + dy**2 + dz**2
-        distance = np.sqrt(dist_sq)
-        
-        # Lennard-Jones style potential for vertical neighbors
-        # They want to be close (connected), but not eclipsed.
-        # Ideally, there is a "sweet spot" distance.
-        
-        # Repulsion term (Avoid overlap/shadowing)
-        repulsion = 1.0 / (distance**12) 
-        # Attraction term (Chemical bonding/Flow continuity)
-        attraction = 1.0 / (distance**6)
-        
-        energy = repulsion - attraction
-        return energy
+    # --- ALL-PAIRS ENERGY FOR EVERY ANGLE AT ONCE (per base pair) ---
+    stability_scores = helix_energy(test_angles, vertical_spacing, radius, n_layers) / n_layers
 
-    # --- RUN SWEEP ---
-    for theta in test_angles:
-        score = calculate_interlayer_stress(theta)
-        stability_scores.append(score)
+    # --- FIND OPTIMUM: best grid angle, refined by gradient descent ---
+    best = optimize_helix(test_angles[np.argmin(stability_scores)], vertical_spacing, radius,
+                          n_layers, free=('twist',))
+    optimal_angle = best['twist']
+    min_energy = best['energy'] / n_layers
 
-    # --- FIND OPTIMUM ---
-    min_energy = min(stability_scores)
-    optimal_angle = test_angles[stability_scores.index(min_energy)]
+    # --- FULL GEOMETRY SCAN: twist x rise x radius (10^6 helices), then refine ---
+    twist, rise, width = np.meshgrid(np.linspace(0, 180, 200), np.linspace(0.5, 2.0, 100),
+                                     np.linspace(0.5, 2.0, 50), indexing='ij')
+    landscape = helix_energy(twist, rise, width, n_layers)
+    k = np.unravel_index(np.argmin(landscape), landscape.shape)
+    free_best = optimize_helix(twist[k], rise[k], width[k], n_layers)
+    print(f"   Free geometry optimum: twist {free_best['twist']:.2f} deg, "
+          f"rise {free_best['rise']:.3f}, radius {free_best['radius']:.3f}")
 
     # --- VISUALIZATION ---
     fig = plt.figure(figsize=(14, 6), facecolor='#111111')
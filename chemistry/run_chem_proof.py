@@ -1,75 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import numpy as np
 import matplotlib.pyplot as plt
-import os
+from src.chemistry import FlowField, diatomic, triatomic
 
-def run_lennard_jones_proof():
-    print("⚗️ INITIALIZING QGU CHEMISTRY PROOF...")
-    print("   Testing Law-4: Can Flow-Merge create Atomic Bonding?")
+# ==========================================
+# 1. SETUP THE "FLOW FIELD" (1D Universe)
+# ==========================================
+# Space from -5 to 10 (arbitrary units)
+x = np.linspace(-5, 10, 1000)
 
-    # ==========================================
-    # 1. SETUP THE "FLOW FIELD" (1D Universe)
-    # ==========================================
-    # Space from -5 to 10 (arbitrary units)
-    x = np.linspace(-5, 10, 1000)
-    dx = x[1] - x[0]
+# Constants for QGU Physics
+# Alpha: Gradient Energy (Attraction - Smoothing)
+# Beta: Density Compression (Repulsion - Overcrowding)
+ALPHA, BETA = 1.0, 0.3
 
-    # Atom Parameters (Gaussian "Bhawar")
-    sigma = 0.8  # Size of the atom
-    strength = 1.0 # Intensity of flow
+# Bond length x bond angle surface of a bent A-B-A molecule on a 3D grid
+PES_GRID = 48                             # points per axis, box [-6, 6]^3
+PES_LENGTHS = np.linspace(0.3, 4.0, 40)
+PES_ANGLES = np.linspace(30, 180, 40)     # degrees
 
-    def get_atom_density(center_pos):
-        return strength * np.exp(-((x - center_pos)**2) / (2 * sigma**2))
+def run_lennard_jones_proof():
+    print("⚗️ INITIALIZING QGU CHEMISTRY PROOF...")
+    print("   Testing Law-4: Can Flow-Merge create Atomic Bonding?")
 
     # ==========================================
     # 2. CALCULATE INTERACTION ENERGY
     # ==========================================
     # We move Atom B closer to Atom A (fixed at 0)
     distances = np.linspace(0.1, 4.0, 100)
-    potential_energy = []
-
-    # Constants for QGU Physics
-    # Alpha: Gradient Energy (Attraction - Smoothing)
-    # Beta: Density Compression (Repulsion - Overcrowding)
-    alpha = 1.0 
-    beta = 0.3  
-
-    # Reference Energy (Single Atom)
-    rho_single = get_atom_density(0)
-    grad_single = np.gradient(rho_single, dx)
-    E_single = np.sum(0.5 * alpha * grad_single**2 + beta * rho_single**4)
-    
-    # E_infinity (Two separated atoms)
-    E_ref = 2 * E_single
 
     print("   Simulating atomic approach...")
-    
-    for r in distances:
-        # Create Fields
-        rho_A = get_atom_density(0)
-        rho_B = get_atom_density(r)
-        
-        # Merged Field (Linear Superposition)
-        rho_total = rho_A + rho_B
-        
-        # --- APPLY LAW-4 (Gradient Energy) ---
-        # "Nature loves smooth gradients"
-        grad_total = np.gradient(rho_total, dx)
-        E_gradient = np.sum(0.5 * alpha * grad_total**2)
-        
-        # --- APPLY DENSITY COST (Repulsion) ---
-        # "Space resists infinite density"
-        E_compression = np.sum(beta * rho_total**4)
-        
-        # Interaction Energy = System - Isolated Atoms
-        interaction_E = (E_gradient + E_compression) - E_ref
-        potential_energy.append(interaction_E)
+    # All separations in one batch (np.gradient-style differences, as before)
+    field = FlowField([x], ALPHA, BETA, gradient='fd', dtype=np.float64)
+    potential_energy = list(field.interaction_energy(diatomic(distances)))
 
     # ==========================================
     # 3. VISUALIZATION
     # ==========================================
     plt.figure(figsize=(10, 6), facecolor='#111111')
     ax = plt.gca()
-    ax.set_facecolor='#111111')
+    ax.set_facecolor('#111111')
 
     # Plot the curve
     plt.plot(distances, potential_energy, color='cyan', linewidth=3, label="QGU Interaction Energy")
@@ -98,7 +71,37 @@ def run_lennard_jones_proof():
     save_path = "figures/qgu_chemical_bond.png"
     plt.savefig(save_path, facecolor='#111111')
     print(f"📸 Proof Generated: {save_path}")
+
+    map_bond_angle_surface()
     plt.show()
 
+def map_bond_angle_surface():
+    print("   Mapping bond length x angle surface (3D field, FFT gradients)...")
+    field = FlowField.cube(6.0, PES_GRID, alpha=ALPHA, beta=BETA)
+    energy = field.interaction_energy(triatomic(PES_LENGTHS, PES_ANGLES))
+    energy = energy.reshape(len(PES_LENGTHS), len(PES_ANGLES))
+    i, j = np.unravel_index(np.argmin(energy), energy.shape)
+    print(f"   Minimum: r = {PES_LENGTHS[i]:.2f}, angle = {PES_ANGLES[j]:.0f} deg, E = {energy[i, j]:.2f}")
+
+    plt.figure(figsize=(10, 7), facecolor='#111111')
+    ax = plt.gca()
+    ax.set_facecolor('#111111')
+    # Clip the repulsive core so the bonding basin stays visible
+    levels = np.linspace(energy.min(), max(-energy.min(), 1.0), 40)
+    cs = plt.contourf(PES_ANGLES, PES_LENGTHS, np.clip(energy, None, levels[-1]), levels=levels, cmap='magma')
+    plt.colorbar(cs, label="Interaction Energy")
+    plt.scatter([PES_ANGLES[j]], [PES_LENGTHS[i]], color='cyan', s=100, zorder=5,
+                label=f"Stable Geometry (r={PES_LENGTHS[i]:.2f}, {PES_ANGLES[j]:.0f}\u00b0)")
+
+    plt.title("QGU: BOND LENGTH x ANGLE ENERGY SURFACE (A-B-A)", color='white', fontsize=14)
+    plt.xlabel("Bond Angle (degrees)", color='white')
+    plt.ylabel("Bond Length", color='white')
+    plt.legend()
+    plt.tick_params(colors='white')
+
+    save_path = "figures/qgu_bond_angle_surface.png"
+    plt.savefig(save_path, facecolor='#111111')
+    print(f"📸 Surface Generated: {save_path}")
+
 if __name__ == "__main__":
     run_lennard_jones_proof()
\ No newline at end of file
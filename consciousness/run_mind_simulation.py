@@ -1,7 +1,18 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 import networkx as nx
-import os
+
+from src.mind import MindNetwork
+
+# Batched learning of many memories at once (see learn_many_memories)
+BATCH_NEURONS = 10000
+BATCH_MEMORIES = 200
+BATCH_EPOCHS = 5
 
 def run_mind_simulation():
     print("🧠 QGU MIND SIMULATION: MEMORY AS FLOW...")
@@ -9,17 +20,10 @@ def run_mind_simulation():
 
     # --- 1. SETUP THE "LIQUID BRAIN" ---
     # Create a random graph of "Neurons"
+    # Every connection (Edge) starts with "Resistance" 1.0 (all paths are hard)
     num_neurons = 20
-    G = nx.erdos_renyi_graph(num_neurons, 0.3, seed=42)
-    
-    # Assign "Resistance" to each connection (Edge)
-    # Initially, all paths are hard (High Resistance)
-    for u, v in G.edges():
-        G[u][v]['resistance'] = 1.0
-        G[u][v]['flow_count'] = 0
-
-    # Layout for visualization
-    pos = nx.spring_layout(G, seed=42)
+    brain = MindNetwork.from_networkx(nx.erdos_renyi_graph(num_neurons, 0.3, seed=42),
+                                      resistance=1.0)
 
     # --- 2. THE LEARNING PHASE (TRAINING) ---
     # Hum ek specific Input -> Output path ko baar-baar trigger karenge
@@ -30,34 +34,25 @@ def run_mind_simulation():
     
     # QGU LEARNING RULE: "Erosion"
     # Every time flow passes, Resistance decreases (Path gets wider)
+    # Minimum resistance is 0.1 (Cannot be zero)
     learning_rate = 0.05
     iterations = 50
     
-    path_history = []
-    
-    for i in range(iterations):
-        try:
-            # Find the path of least resistance (Shortest weighted path)
-            # Weight = Resistance
-            path = nx.shortest_path(G, source=start_node, target=end_node, weight='resistance')
-            path_history.append(path)
-            
-            # Reinforce the path (Hebb's Law / Flow Erosion)
-            for j in range(len(path) - 1):
-                u, v = path[j], path[j+1]
-                # Reduce resistance (Widen the pipe)
-                # Minimum resistance is 0.1 (Cannot be zero)
-                G[u][v]['resistance'] = max(0.1, G[u][v]['resistance'] - learning_rate)
-                G[u][v]['flow_count'] += 1
-                
-        except nx.NetworkXNoPath:
-            print("   No path found!")
-            break
+    path_history = brain.train(start_node, end_node, iterations, learning_rate, floor=0.1)
+    if path_history and path_history[-1] is None:
+        print("   No path found!")
+        path_history.pop()
+    print(f"   Learned path: {path_history[-1] if path_history else None} "
+          f"({brain.dijkstra_runs} Dijkstra runs for {len(path_history)} signals)")
+
+    # networkx only for export / drawing
+    G = brain.to_networkx()
+    pos = nx.spring_layout(G, seed=42)
 
     # --- 3. VISUALIZATION (The Scan) ---
     plt.figure(figsize=(10, 8), facecolor='#111111')
     ax = plt.gca()
-    ax.set_facecolor='#111111')
+    ax.set_facecolor('#111111')
 
     # Draw all edges (Faint lines = Unused connections)
     nx.draw_networkx_edges(G, pos, edge_color='#333333', alpha=0.3, width=1)
@@ -95,5 +90,28 @@ def run_mind_simulation():
     print(f"📸 Brain Scan Generated: {save_path}")
     plt.show()
 
+def learn_many_memories(seed=0):
+    """
+    Batched Hebbian training: every epoch sends one signal per memory
+    (input -> output pair), finds all their paths with one multi-source
+    Dijkstra and erodes every traversed edge with one scatter-add.
+    """
+    print(f"\n🧠 BATCH LEARNING: {BATCH_MEMORIES} memories on {BATCH_NEURONS} neurons...")
+    brain = MindNetwork.random(BATCH_NEURONS, mean_degree=6, seed=seed)
+    rng = np.random.default_rng(seed)
+    inputs, outputs = rng.integers(0, BATCH_NEURONS, (2, BATCH_MEMORIES))
+
+    start = time.perf_counter()
+    hops = brain.train_batch(inputs, outputs, epochs=BATCH_EPOCHS)
+    elapsed = time.perf_counter() - start
+
+    signals = BATCH_EPOCHS * BATCH_MEMORIES
+    print(f"   {signals} signals in {elapsed:.2f}s ({signals / elapsed:.0f} signals/s)")
+    print(f"   Mean path length: {hops[0][hops[0] >= 0].mean():.2f} -> "
+          f"{hops[-1][hops[-1] >= 0].mean():.2f} hops")
+    print(f"   Memory channels (edges used): {(brain.flow_count > 0).sum()} / {brain.num_edges}")
+    return brain
+
 if __name__ == "__main__":
-    run_mind_simulation()
\ No newline at end of file
+    run_mind_simulation()
+    learn_many_memories()
\ No newline at end of file
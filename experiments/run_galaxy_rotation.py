@@ -0,0 +1,88 @@
+import sys
+import os
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from src.galaxy import (ALPHA_NEWTON, ALPHA_QGU, make_galaxy, rotation_curves)
+
+# Visible matter only (kpc, solar masses): exponential disk + Hernquist bulge
+N_DISK = 1_000_000
+N_BULGE = 200_000
+DISK_MASS = 6e10
+BULGE_MASS = 1e10
+SCALE_LENGTH = 3.0
+
+MAX_RADIUS = 20.0
+BINS = 80
+ALPHAS = np.linspace(0.6, 1.0, 9)   # kernel family scanned in one pass (includes 0.8 and 1)
+MATCHING_RADIUS = 1.0               # QGU kernel pulls like Newton at this radius
+
+MESH_CHECK = True                   # general (non-spherical) solver on the same disk
+MESH_GRID = 96
+SOFTENING = 0.2
+
+def run_galaxy_rotation():
+    print("🌀 QGU GALAXY ROTATION: Newton vs QGU kernel...")
+    rng = np.random.default_rng(42)
+
+    # 1. Build the galaxy (no dark matter halo)
+    system = make_galaxy(N_DISK, N_BULGE, DISK_MASS, BULGE_MASS, SCALE_LENGTH, rng=rng)
+    print(f"   {system.n:,} particles ({N_DISK:,} disk + {N_BULGE:,} bulge)")
+    edges = np.linspace(0.25, MAX_RADIUS, BINS + 1)
+
+    # 2. Spherical curves for every alpha (sorted radii + cumulative sums)
+    start = time.perf_counter()
+    radius, curves = rotation_curves(system, edges, ALPHAS, matching_radius=MATCHING_RADIUS)
+    print(f"   {len(ALPHAS)} kernels in {time.perf_counter() - start:.2f}s")
+    newton = curves[np.argmin(abs(ALPHAS - ALPHA_NEWTON))]
+    qgu = curves[np.argmin(abs(ALPHAS - ALPHA_QGU))]
+    for name, v in (("Newton", newton), (f"QGU alpha={ALPHA_QGU}", qgu)):
+        print(f"   {name:<16} peak {v.max():6.1f} km/s, v({MAX_RADIUS:.0f} kpc) / peak = {v[-1] / v.max():.2f}")
+
+    # 3. Mesh solver on the actual disk geometry
+    mesh = None
+    if MESH_CHECK:
+        start = time.perf_counter()
+        _, mesh = rotation_curves(system, edges, [ALPHA_NEWTON, ALPHA_QGU], method='mesh',
+                                  softening=SOFTENING, matching_radius=MATCHING_RADIUS,
+                                  grid_size=MESH_GRID)
+        print(f"   Mesh check ({MESH_GRID}^3) in {time.perf_counter() - start:.2f}s")
+
+    # 4. Visualization
+    plt.figure(figsize=(10, 6), facecolor='#111111')
+    ax = plt.gca()
+    ax.set_facecolor('#111111')
+
+    for alpha, v in zip(ALPHAS, curves):
+        ax.plot(radius, v, color='cyan', alpha=0.15, lw=1)
+    ax.plot(radius, newton, '--', color='grey', lw=2, label='Newtonian Prediction (Need Dark Matter)')
+    ax.plot(radius, qgu, color='cyan', lw=3, label=f'QGU Prediction (Alpha={ALPHA_QGU})')
+    if mesh is not None:
+        ax.plot(radius, mesh[0], '.', color='grey', ms=4, label='Newtonian (mesh, disk geometry)')
+        ax.plot(radius, mesh[1], '.', color='cyan', ms=4, label='QGU (mesh, disk geometry)')
+
+    # Visible matter: disk surface density, scaled onto the velocity axis
+    cylindrical = np.hypot(system.pos[:, 0], system.pos[:, 1])
+    counts, _ = np.histogram(cylindrical, edges)
+    surface = counts / (np.pi * (edges[1:] ** 2 - edges[:-1] ** 2))
+    ax.fill_between(radius, 0, surface / surface.max() * 0.3 * newton.max(),
+                    color='magenta', alpha=0.2, label='Visible Matter Density')
+
+    ax.set_title("GALAXY ROTATION CURVE: Newton vs QGU", color='white', fontsize=14)
+    ax.set_xlabel("Distance from Center (kpc)", color='white')
+    ax.set_ylabel("Orbital Velocity (km/s)", color='white')
+    ax.tick_params(colors='white')
+    ax.grid(True, color='#333333')
+    ax.legend(loc='upper left')
+
+    if not os.path.exists("figures"): os.makedirs("figures")
+    save_path = "figures/galaxy_rotation_curve.png"
+    plt.savefig(save_path, facecolor='#111111')
+    print(f"📸 Rotation Curve Saved: {save_path}")
+    plt.show()
+
+if __name__ == "__main__":
+    run_galaxy_rotation()
@@ -5,22 +5,38 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import numpy as np
 import matplotlib.pyplot as plt
 from src.qgu_core import QGU_System
+from src.simulation import Simulation
+from src.laws.law1_time import time_dilation
+from src.sweep import run_sweep
+
+def measure_cloud(mass, gamma, rng):
+    """Runs a small cloud of the given particle mass; returns (rho, dt factor) per particle."""
+    system = QGU_System()
+    system.add_entities(rng.normal(0, 4, (400, 3)), mass=mass)
+    sim = Simulation(system, dt=0.1, gamma=gamma)
+    sim.run(10)
+    return system.local_density.copy(), system.time_dilation_factor.copy()
+
+def report_sweep(computed, missing, cached):
+    if computed == missing:
+        print(f"   Sweep: {computed} computed, {cached} from cache")
 
 def run_experiment():
     print("⏳ Running Law-1 (Time Dilation) Experiment...")
     
     # We will simulate particles in different density environments
     densities = np.linspace(0, 20, 50)
-    time_factors = []
-    
-    system = QGU_System()
-    
-    for rho in densities:
-        # Simulate a theoretical particle in a field of density 'rho'
-        # Formula: dt_eff = dt / (1 + gamma * rho)
-        gamma = 0.5
-        time_dilation = 1.0 / (1.0 + gamma * rho)
-        time_factors.append(time_dilation)
+    gamma = 0.5
+
+    # Theory: a particle in a field of density 'rho'
+    # Formula: dt_eff = dt / (1 + gamma * rho)
+    time_factors = time_dilation(densities, gamma)
+
+    # Measurement: clouds of increasing density (parallel, cached per cloud)
+    _, clouds = run_sweep(measure_cloud, {'mass': [0.05, 0.1, 0.2, 0.4], 'gamma': [gamma]},
+                          progress=report_sweep)
+    measured_rho = np.concatenate([rho for rho, _ in clouds])
+    measured_dt = np.concatenate([dt for _, dt in clouds])
 
     # Plot
     if not os.path.exists("figures"): os.makedirs("figures")
@@ -30,6 +46,8 @@ def run_experiment():
     ax.set_facecolor('#111111')
     
     plt.plot(densities, time_factors, c='cyan', lw=3, label="Time Flow Rate (dt)")
+    plt.scatter(measured_rho, measured_dt, c='magenta', s=8,
+                alpha=0.6, zorder=3, label="Simulated Particles")
     plt.axhline(y=1.0, color='gray', linestyle='--', alpha=0.5, label="Vacuum Time Speed")
     
     plt.title("LAW-1: Emergent Time Dilation", color='white')
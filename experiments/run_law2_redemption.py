@@ -7,9 +7,12 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy.stats as stats
 from src.qgu_core import QGU_System
+from src.simulation import Simulation
 
 # CONFIGURATION
 STEPS = 200
+FORCE_BACKEND = 'direct'   # 'barnes_hut' for large particle counts
+BACKGROUND = False         # True: fixed gravity from grids (pays off for thousands of fixed entities)
 
 def run_experiment():
     print("🚀 Initializing Law-2 Redemption Experiment...")
@@ -26,34 +29,27 @@ def run_experiment():
         pos = np.random.uniform(5, 20, 3)
         p = system.add_entity(pos, mass=1.0, fixed=False)
         test_subjects.append(p)
+    subject_ids = np.array([p.id for p in test_subjects])
         
     gradients = []
     accelerations = []
     
     # 3. Simulation Loop
     print("🧪 Simulating Physics...")
+    sim = Simulation(system, dt=0.1, force_backend=FORCE_BACKEND, softening=0.5)
+    system.set_background(BACKGROUND)
     for t in range(STEPS):
-        # Physics Step (Simple N-Body for generation)
-        for p in system.entities:
-            if p.fixed: continue
-            force = np.zeros(3)
-            for other in system.entities:
-                if p == other: continue
-                delta = other.pos - p.pos
-                dist = np.linalg.norm(delta) + 0.5
-                f_mag = (1.0 * p.mass * other.mass) / (dist**2)
-                force += f_mag * (delta/dist)
-            p.acc = force / p.mass
-            p.vel += p.acc * 0.1
-            p.pos += p.vel * 0.1
+        # Physics Step (Leapfrog with Law-1 time dilation)
+        sim.step()
             
         # Data Collection
         if t % 5 == 0:
-            for p in test_subjects:
-                grad, accel = system.calculate_gradient_acceleration(p)
-                if grad > 0.01 and accel > 0.001:
-                    gradients.append(grad)
-                    accelerations.append(accel)
+            # One batched pass for every test subject (analytic Law-2 gradient)
+            _, grad_vec, accel = system.density_gradient(subject_ids)
+            grad = np.linalg.norm(grad_vec, axis=1)
+            keep = (grad > 0.01) & (accel > 0.001)
+            gradients.extend(grad[keep])
+            accelerations.extend(accel[keep])
                     
     # 4. Analysis
     if len(gradients) > 0:
@@ -5,58 +5,80 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import numpy as np
 import matplotlib.pyplot as plt
 from src.qgu_core import QGU_System
+from src.sweep import run_sweep
+from src.laws.law3_structure import (cluster_sizes, connected_clusters, critical_temperature,
+                                     size_distribution, structure_fraction, thermalize)
+
+NUM_PARTICLES = 2000     # 10**4 for production sweeps
+NUM_TEMPS = 40           # 100 for production sweeps
+NUMBER_DENSITY = 0.02    # particles per unit volume inside the box
+LANGEVIN_STEPS = 300
+
+def phase_point(T, rng):
+    """Structure % and cluster sizes after Langevin dynamics at temperature T."""
+    # Random gas in a reflecting box
+    box = 0.5 * (NUM_PARTICLES / NUMBER_DENSITY) ** (1 / 3)
+    system = QGU_System(num_particles=NUM_PARTICLES, space_size=box)
+    system.add_entities(rng.uniform(-box, box, (NUM_PARTICLES, 3)))
+
+    # Let physics run with Noise = T (thermostatted Law-2 dynamics)
+    thermalize(system, T, steps=LANGEVIN_STEPS, rng=rng, box=box)
+
+    # Bonded clusters (neighbour list + union-find)
+    labels = connected_clusters(system.pos)
+    return {
+        'structure': structure_fraction(labels) * 100,
+        'largest': cluster_sizes(labels)[0] / NUM_PARTICLES * 100,
+        'sizes': size_distribution(labels),
+    }
+
+def report_sweep(computed, missing, cached):
+    if computed == missing:
+        print(f"   Sweep: {computed} computed, {cached} from cache")
 
 def run_experiment():
     print("❄️ Running Law-3 (Structure Phase Transition) Experiment...")
     
-    temps = np.linspace(2.0, 0.0, 40) # Hot to Cold
-    clustering_scores = []
+    # Hot to Cold (T = 0 has no noise to drive the dynamics, so stop just above)
+    temps = np.linspace(2.0, 0.05, NUM_TEMPS)
     
-    # Run simulation for each temperature
-    for T in temps:
-        # Create a mini system
-        system = QGU_System(num_particles=50, space_size=10)
-        # Random positions
-        for _ in range(50):
-            system.add_entity(np.random.uniform(-10,10,3), fixed=False)
-            
-        # Let physics run briefly with Noise = T
-        # (Simplified Clustering Metric for demonstration)
-        connected_particles = 0
-        total_pairs = 0
-        
-        # Check connections
-        for i in range(len(system.entities)):
-            for j in range(i+1, len(system.entities)):
-                dist = np.linalg.norm(system.entities[i].pos - system.entities[j].pos)
-                if dist < 2.0: # Interaction radius
-                    # Probability of bonding increases as Temp decreases
-                    bond_prob = np.exp(-dist) * (1.0 / (1.0 + T))
-                    if bond_prob > 0.3:
-                        connected_particles += 1
-                total_pairs += 1
-                
-        score = (connected_particles / len(system.entities)) * 100
-        clustering_scores.append(score)
+    # Run simulation for each temperature (parallel, cached per temperature)
+    _, points = run_sweep(phase_point, {'T': temps}, progress=report_sweep)
+    clustering_scores = [p['structure'] for p in points]
+    tc = critical_temperature(temps, clustering_scores)
+    print(f"   Measured Tc ~ {tc:.2f}")
 
     # Plot
     if not os.path.exists("figures"): os.makedirs("figures")
     
-    plt.figure(figsize=(10, 6), facecolor='#111111')
-    ax = plt.axes()
+    fig, (ax, ax_sizes) = plt.subplots(1, 2, figsize=(15, 6), facecolor='#111111')
     ax.set_facecolor('#111111')
     
-    plt.plot(temps, clustering_scores, c='magenta', lw=3, marker='o', label="Structure %")
-    plt.gca().invert_xaxis() # Hot on left, Cold on right
+    ax.plot(temps, clustering_scores, c='magenta', lw=3, marker='o', label="Structure %")
+    ax.plot(temps, [p['largest'] for p in points], c='cyan', lw=1.5, label="Largest cluster %")
+    ax.invert_xaxis() # Hot on left, Cold on right
     
-    # Mark Critical Temp
-    plt.axvline(x=0.38, color='lime', linestyle='--', label="Critical Temp (Tc ~ 0.38)")
+    # Mark Critical Temp (measured: where structure crosses half height)
+    ax.axvline(x=tc, color='lime', linestyle='--', label=f"Measured Tc ~ {tc:.2f}")
+    ax.axvline(x=0.38, color='gray', linestyle=':', label="Claimed Tc ~ 0.38")
     
-    plt.title("LAW-3: The Phase Transition of Structure", color='white')
-    plt.xlabel("Temperature (Noise/Chaos)", color='white')
-    plt.ylabel("Structural Complexity (%)", color='white')
-    plt.grid(True, color='#333333')
-    plt.legend()
+    ax.set_title("LAW-3: The Phase Transition of Structure", color='white')
+    ax.set_xlabel("Temperature (Noise/Chaos)", color='white')
+    ax.set_ylabel("Structural Complexity (%)", color='white')
+    ax.grid(True, color='#333333')
+    ax.legend()
+
+    # Cluster-size distributions on both sides of the transition
+    ax_sizes.set_facecolor('#111111')
+    for k in np.linspace(0, len(temps) - 1, 4).astype(int):
+        counts = points[k]['sizes']
+        s = np.flatnonzero(counts)
+        ax_sizes.loglog(s, counts[s], marker='o', lw=1, label=f"T = {temps[k]:.2f}")
+    ax_sizes.set_title("Cluster Size Distribution", color='white')
+    ax_sizes.set_xlabel("Cluster size", color='white')
+    ax_sizes.set_ylabel("Number of clusters", color='white')
+    ax_sizes.grid(True, color='#333333')
+    ax_sizes.legend()
     
     plt.savefig("figures/law3_phase_transition.png")
     print("📸 Graph saved: figures/law3_phase_transition.png")
@@ -5,14 +5,36 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from src.qgu_core import QGU_System
+from src.simulation import Simulation, BlockSimulation
+from src.trajectory import TrajectoryWriter
+from src.render import RenderWorker, SnapshotRenderer
 
-def run_3d_simulation():
+FORCE_BACKEND = 'direct'   # 'barnes_hut' or 'particle_mesh' (periodic FFT) for large particle counts
+BLOCK_TIMESTEPS = False    # True: BlockSimulation (pays off only when orbits need dt / 2^k)
+BACKGROUND = False         # True: fixed gravity from grids (pays off for thousands of fixed entities)
+
+FRAMES = 1000
+RESULTS_DIR = 'results'
+TRAJECTORY = os.path.join(RESULTS_DIR, 'universe_3d.traj')      # open with src.trajectory.Trajectory
+CHECKPOINT = os.path.join(RESULTS_DIR, 'universe_3d.ckpt')
+CHECKPOINT_EVERY = 100
+RESUME = True              # continue from CHECKPOINT if a previous run left one
+
+HEADLESS = False           # True: no window, PNG frames in FRAMES_DIR (cluster nodes)
+RENDER_EVERY = 5           # physics steps per rendered frame
+TRAIL_LENGTH = 20          # rendered frames of orbit trail per particle (0 = off)
+FRAMES_DIR = os.path.join(RESULTS_DIR, 'frames')   # or render_trajectory(TRAJECTORY, ...) afterwards
+
+PROFILE = False            # per-phase timers / counters, printed at the end and saved as JSON
+PROFILE_REPORT = os.path.join(RESULTS_DIR, 'universe_3d_profile.json')
+
+def build_simulation():
     print("🌌 Initializing QGU Universe in 3D...")
     
-    # 1. Setup 3D System (Bada Space)
-    system = QGU_System(space_size=30)
+    # 1. Setup 3D System (Bada Space): a torus universe, [-30, 30) wrapped on every axis
+    system = QGU_System(space_size=30, periodic=True)
+    system.g_const = 0.8
     
     # Create a Central Star Cluster (Heavy Density)
     for _ in range(100):
@@ -34,77 +56,58 @@ def run_3d_simulation():
         # Add random drift
         p.vel += np.random.uniform(-0.05, 0.05, 3)
 
-    # 2. Visualization Setup
-    plt.ion() # Interactive mode
-    fig = plt.figure(figsize=(12, 10), facecolor='black')
-    ax = fig.add_subplot(111, projection='3d')
-    ax.set_facecolor('black')
-    
-    # Remove ugly grid/axes for Space look
-    ax.grid(False)
-    ax.xaxis.pane.fill = False
-    ax.yaxis.pane.fill = False
-    ax.zaxis.pane.fill = False
-    ax.axis('off')
+    engine = BlockSimulation if BLOCK_TIMESTEPS else Simulation
+    sim = engine(system, dt=0.1, force_backend=FORCE_BACKEND, softening=1.0)
+    system.set_background(BACKGROUND)
+    return sim, TrajectoryWriter(TRAJECTORY, system.n)
 
-    print("🎥 3D Simulation Started... (Press Ctrl+C to stop)")
+def run_3d_simulation():
+    if RESUME and os.path.exists(CHECKPOINT):
+        sim = Simulation.resume(CHECKPOINT)
+        print(f"♻️  Resuming from {CHECKPOINT} at frame {sim.step_count}")
+        # Frames written after the checkpoint are replayed, so drop them
+        writer = TrajectoryWriter.append(TRAJECTORY)
+        writer.truncate(sim.step_count)
+    else:
+        sim, writer = build_simulation()
+    system = sim.system
+    profiler = system.set_profiler(PROFILE)
+    sim.record(writer)
+    sim.checkpoint(CHECKPOINT, every=CHECKPOINT_EVERY)
 
-    # 3. Simulation Loop
+    print("🎥 3D Simulation Started... (Press Ctrl+C to stop)")
     try:
-        for t in range(1000):
-            # Physics Step (Reusing Core Logic implicitly)
-            for p in system.entities:
-                if p.fixed: continue
-                
-                # Simple 3D Gravity Calculation
-                force = np.zeros(3)
-                for other in system.entities:
-                    if p == other: continue
-                    delta = other.pos - p.pos
-                    dist = np.linalg.norm(delta) + 1.0 # Softening
-                    
-                    # F = G * m1 * m2 / r^2
-                    f_mag = (0.8 * p.mass * other.mass) / (dist**2)
-                    force += f_mag * (delta/dist)
-                
-                p.acc = force / p.mass
-                p.vel += p.acc * 0.1
-                p.pos += p.vel * 0.1
-                
-                # Boundary Wrap (Torus Universe)
-                for i in range(3):
-                    if p.pos[i] > 30: p.pos[i] = -30
-                    if p.pos[i] < -30: p.pos[i] = 30
-            
-            # Rendering
-            ax.cla()
-            ax.set_xlim(-25, 25)
-            ax.set_ylim(-25, 25)
-            ax.set_zlim(-25, 25)
-            ax.axis('off')
-            
-            # Extract Data for Plotting
-            xs = [e.pos[0] for e in system.entities]
-            ys = [e.pos[1] for e in system.entities]
-            zs = [e.pos[2] for e in system.entities]
-            
-            # Gold for Core, Cyan for Particles
-            colors = ['#FFD700' if e.fixed else '#00FFFF' for e in system.entities]
-            sizes = [30 if e.fixed else 10 for e in system.entities]
-            alpha = [0.6 if e.fixed else 0.9 for e in system.entities]
-            
-            ax.scatter(xs, ys, zs, c=colors, s=sizes, alpha=alpha, depthshade=True)
-            
-            # Cinematic Camera Rotation
-            ax.view_init(elev=20, azim=t*0.5)
-            
-            plt.title(f"QGU 3D Simulation | Frame: {t}", color='white')
-            plt.draw()
-            plt.pause(0.001) # Fast render
+        if HEADLESS:
+            # 2. Offscreen rendering in a separate process; physics never waits on it
+            with sim.record(RenderWorker(system.fixed, FRAMES_DIR, trail=TRAIL_LENGTH), every=RENDER_EVERY) as frames:
+                sim.run(FRAMES - sim.step_count)
+            print(f"🖼️  {frames.frames} frames written to {FRAMES_DIR}")
+            return
+
+        # 2. Visualization Setup (one persistent scatter, updated in place)
+        plt.ion() # Interactive mode
+        view = SnapshotRenderer(system.fixed, fig=plt.figure(figsize=(12, 10)), trail=TRAIL_LENGTH)
+
+        # 3. Simulation Loop
+        while sim.step_count < FRAMES:
+            # Physics Step (F = G * m1 * m2 / r^2, softened, Law-1 dilated dt)
+            sim.run(RENDER_EVERY)
+
+            # Rendering (Cinematic Camera Rotation)
+            with profiler.phase('render'):
+                view.draw(system.pos, sim.step_count)
+                plt.pause(0.001) # Fast render
 
     except KeyboardInterrupt:
         print("\n🛑 Simulation Stopped.")
         plt.close()
+    finally:
+        writer.close()
+        print(f"💾 Trajectory: {TRAJECTORY} ({writer.frames} frames)")
+        if profiler.enabled:
+            print("⏱️  Profile:\n" + profiler.summary())
+            profiler.to_json(PROFILE_REPORT)
+            print(f"   saved to {PROFILE_REPORT}")
 
     plt.show(block=True)
 
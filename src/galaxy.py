@@ -0,0 +1,239 @@
+import numpy as np
+
+from .mesh import ParticleMesh, power_law_kernel
+from .qgu_core import QGU_System
+
+# Interaction kernel exponents: K(r) ~ r^-alpha. alpha = 1 is Newtonian,
+# alpha ~ 0.8 is the QGU galactic-scale kernel.
+ALPHA_NEWTON = 1.0
+ALPHA_QGU = 0.8
+
+# Gravitational constant in kpc (km/s)^2 / solar mass, for galaxies built in
+# kpc and solar masses (circular velocities then come out in km/s).
+G_KPC = 4.30091e-6
+
+# Radial shells the spherical method bins the mass into.
+SHELLS = 4096
+
+# Direct summation works on blocks of about this many (target x source) pairs.
+CHUNK_PAIRS = 1 << 22
+
+
+def exponential_disk(n, mass=1.0, scale_length=3.0, scale_height=0.3, rng=None):
+    """
+    Thin exponential disk in the xy plane: surface density ~ exp(-R / Rd),
+    vertical density ~ exp(-|z| / h).
+    Returns: positions (n, 3), masses (n,)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    radius = rng.gamma(2.0, scale_length, n)  # R exp(-R/Rd) is the radial pdf
+    phi = rng.uniform(0, 2 * np.pi, n)
+    positions = np.stack([radius * np.cos(phi), radius * np.sin(phi),
+                          rng.laplace(0.0, scale_height, n)], axis=1)
+    return positions, np.full(n, mass / max(n, 1))
+
+
+def hernquist_bulge(n, mass=1.0, scale=0.5, max_radius=None, rng=None):
+    """
+    Spherical Hernquist bulge, M(<r) = M r^2 / (r + a)^2, sampled by inverse
+    CDF and truncated at `max_radius` (default 50 a).
+    Returns: positions (n, 3), masses (n,)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    max_radius = 50 * scale if max_radius is None else max_radius
+    top = np.sqrt(max_radius ** 2 / (max_radius + scale) ** 2)
+    q = rng.uniform(0, top, n)                  # q = sqrt(M(<r) / M) = r / (r + a)
+    radius = scale * q / (1 - q)
+    direction = rng.standard_normal((n, 3))
+    direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+    return radius[:, None] * direction, np.full(n, mass / max(n, 1))
+
+
+def make_galaxy(n_disk, n_bulge=0, disk_mass=6e10, bulge_mass=1e10, scale_length=3.0,
+                scale_height=0.3, bulge_scale=0.6, rng=None):
+    """
+    Visible-matter galaxy (disk plus optional bulge, no halo) as a
+    QGU_System; lengths in kpc and masses in solar masses by default.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    parts = [exponential_disk(n_disk, disk_mass, scale_length, scale_height, rng)]
+    if n_bulge:
+        parts.append(hernquist_bulge(n_bulge, bulge_mass, bulge_scale, rng=rng))
+    positions = np.concatenate([p for p, _ in parts])
+    masses = np.concatenate([m for _, m in parts])
+    system = QGU_System(len(positions), space_size=float(np.abs(positions).max()))
+    system.g_const = G_KPC
+    system.add_entities(positions, mass=masses)
+    return system
+
+
+def kernel_coupling(alpha, matching_radius=1.0):
+    """
+    Strength that puts the power-law kernel K(r) = c r^-alpha on the
+    Newtonian scale: the pull of a point mass, c * alpha * m * r^-(alpha+1),
+    equals m / r^2 at r = matching_radius (c = 1 for alpha = 1).
+    """
+    return matching_radius ** (alpha - 1.0) / alpha
+
+
+# ----------------------------------------------------------------------
+# Spherically symmetric mass: sorted radii + cumulative sums
+# ----------------------------------------------------------------------
+def shell_slope(r, s, alpha, softening=0.0):
+    """
+    d(Phi)/dr at radius r of a unit-mass thin shell of radius s, where Phi
+    is the shell averaged kernel (d^2 + eps^2)^(-alpha/2):
+
+        Phi(r) = (A^p - B^p) / (4 r s p),   p = 1 - alpha/2,
+        A = (r + s)^2 + eps^2,  B = (r - s)^2 + eps^2      (log(A/B) at p = 0)
+
+    For alpha = 1, eps = 0 this is the shell theorem (-1/r^2 outside the
+    shell, 0 inside). Shells much smaller than r act as point masses.
+    """
+    r, s = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(s, dtype=float))
+    eps2 = softening ** 2
+    p = 1.0 - alpha / 2
+    point = s < 1e-3 * r
+    ss = np.where(point, 1.0, s)
+    a = (r + ss) ** 2 + eps2
+    b = (r - ss) ** 2 + eps2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = np.log(a / b) if p == 0 else (a ** p - b ** p) / p
+        b_term = np.where(b > 0, (r - ss) * b ** (p - 1), 0.0)
+        df = 2 * ((r + ss) * a ** (p - 1) - b_term)
+        shell = (df / r - f / (r * r)) / (4 * ss)
+        d2 = r * r + eps2
+        as_point = -alpha * r * d2 ** (-alpha / 2 - 1)
+    return np.where(point, as_point, shell)
+
+
+def radial_shells(radii, masses, shells=SHELLS):
+    """
+    Mass and mass-weighted mean radius in `shells` log-spaced radial bins,
+    from one sort of the radii and cumulative sums read off at the bin edges.
+    Returns: shell radius (S,), shell mass (S,) (empty shells dropped)
+    """
+    order = np.argsort(radii)
+    r, m = radii[order], masses[order]
+    cum_m = np.concatenate([[0.0], np.cumsum(m)])
+    cum_mr = np.concatenate([[0.0], np.cumsum(m * r)])
+    inner = r[r > 0][0] if (r > 0).any() else 1.0
+    edges = np.concatenate([[0.0], np.geomspace(inner, r[-1] * (1 + 1e-12), shells)])
+    at = np.searchsorted(r, edges, side='right')
+    mass = np.diff(cum_m[at])
+    keep = mass > 0
+    return np.diff(cum_mr[at])[keep] / mass[keep], mass[keep]
+
+
+def spherical_rotation_curve(positions, masses, radii, alphas=(ALPHA_NEWTON,), g_const=1.0,
+                             softening=0.0, matching_radius=1.0, shells=SHELLS):
+    """
+    Circular velocities v(r) = sqrt(-r dPhi/dr) at `radii` for every kernel
+    exponent in `alphas`, treating the mass as spherically symmetric (exact
+    for bulges, the usual approximation for disks).
+
+    The Newtonian case (alpha = 1, no softening) is exact: v^2 = G M(<r) / r
+    from sorted radii and a cumulative mass. Other kernels break the shell
+    theorem, so every shell pulls on every radius; the mass is binned into
+    radial shells with cumulative sums and the closed-form shell field is
+    summed, O(N log N + len(radii) * shells) per alpha.
+    Returns: velocities (len(alphas), len(radii))
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.broadcast_to(np.asarray(masses, dtype=float), (len(positions),))
+    radii = np.asarray(radii, dtype=float)
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    spherical = np.sqrt(np.einsum('nd,nd->n', positions, positions))
+
+    velocity = np.empty((len(alphas), len(radii)))
+    shell_r = shell_m = None
+    for k, alpha in enumerate(alphas):
+        if alpha == 1.0 and softening == 0:
+            order = np.argsort(spherical)
+            enclosed = np.concatenate([[0.0], np.cumsum(masses[order])])
+            inside = np.searchsorted(spherical[order], radii, side='right')
+            v2 = g_const * enclosed[inside] / radii
+        else:
+            if shell_r is None:
+                shell_r, shell_m = radial_shells(spherical, masses, shells)
+            slope = shell_slope(radii[:, None], shell_r[None, :], alpha, softening) @ shell_m
+            v2 = -g_const * kernel_coupling(alpha, matching_radius) * radii * slope
+        velocity[k] = np.sqrt(np.maximum(v2, 0.0))
+    return velocity
+
+
+# ----------------------------------------------------------------------
+# General mass distributions: per-particle accelerations, binned by radius
+# ----------------------------------------------------------------------
+def circular_velocity(positions, accelerations):
+    """
+    Per-particle circular velocity in the xy plane from the inward radial
+    acceleration: v = sqrt(-R a_R), R the cylindrical radius.
+    """
+    radius = np.hypot(positions[:, 0], positions[:, 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a_r = (positions[:, 0] * accelerations[:, 0] + positions[:, 1] * accelerations[:, 1]) / radius
+    return radius, np.sqrt(np.maximum(np.nan_to_num(-radius * a_r), 0.0))
+
+
+def direct_accelerations(positions, masses, alpha, softening=0.1):
+    """Exact all-pairs grad rho for the kernel (r^2 + eps^2)^(-alpha/2), O(N^2) (validation)."""
+    kernel = power_law_kernel(alpha, softening)
+    acc = np.empty_like(positions)
+    chunk = max(1, CHUNK_PAIRS // max(len(positions), 1))
+    for start in range(0, len(positions), chunk):
+        rows = np.arange(start, min(start + chunk, len(positions)))
+        _, grad = kernel(positions[rows, None, :] - positions[None, :, :])
+        grad[np.arange(len(rows)), rows] = 0.0
+        acc[rows] = np.einsum('tnd,n->td', grad, masses)
+    return acc
+
+
+def bin_rotation_curve(radius, velocity, edges):
+    """
+    Mean velocity of the particles in each radial bin (NaN for empty bins).
+    Returns: bin centres, mean velocity, particle count
+    """
+    edges = np.asarray(edges, dtype=float)
+    bins = np.searchsorted(edges, radius, side='right') - 1
+    inside = (bins >= 0) & (bins < len(edges) - 1)
+    count = np.bincount(bins[inside], minlength=len(edges) - 1)
+    total = np.bincount(bins[inside], weights=velocity[inside], minlength=len(edges) - 1)
+    with np.errstate(invalid='ignore'):
+        mean = total / count
+    return 0.5 * (edges[1:] + edges[:-1]), mean, count
+
+
+def rotation_curves(system, edges, alphas=(ALPHA_NEWTON, ALPHA_QGU), method='spherical',
+                    softening=0.1, matching_radius=1.0, grid_size=64, shells=SHELLS):
+    """
+    Rotation curves of a QGU_System for each kernel exponent in `alphas`.
+
+    method='spherical': spherical_rotation_curve() at the bin centres
+                        (softening is ignored: point-mass shells).
+    method='mesh':      ParticleMesh(alpha) accelerations of every particle
+                        (O(N + G^3 log G), any shape), binned by radius.
+    method='direct':    exact all-pairs accelerations, binned (small N only).
+    Velocities use system.g_const. Returns: bin centres, velocities (len(alphas), bins)
+    """
+    if method not in ('spherical', 'mesh', 'direct'):
+        raise ValueError(f"Unknown rotation curve method: {method}")
+    positions, masses = system.pos, system.mass
+    edges = np.asarray(edges, dtype=float)
+    centres = 0.5 * (edges[1:] + edges[:-1])
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    if method == 'spherical':
+        return centres, spherical_rotation_curve(positions, masses, centres, alphas,
+                                                 system.g_const, 0.0, matching_radius, shells)
+
+    velocity = np.empty((len(alphas), len(centres)))
+    for k, alpha in enumerate(alphas):
+        if method == 'mesh':
+            mesh = ParticleMesh(grid_size, alpha, softening)
+            _, grad = mesh.field(positions, masses)
+        else:
+            grad = direct_accelerations(positions, masses, alpha, softening)
+        acc = system.g_const * kernel_coupling(alpha, matching_radius) * grad
+        radius, v = circular_velocity(positions, acc)
+        velocity[k] = bin_rotation_curve(radius, v, edges)[1]
+    return centres, velocity
@@ -0,0 +1,260 @@
+import numpy as np
+
+from .mesh import ParticleMesh
+from .periodic import minimum_image
+
+# Targets are processed in chunks so that each (targets x sources) block of
+# the direct sum holds roughly this many pair entries.
+CHUNK_PAIRS = 1 << 22
+
+# Octree depth is capped at 21 levels so a Morton key fits into 63 bits.
+MAX_DEPTH = 21
+
+
+def softened_pull(delta, dist, masses, g_const, softening):
+    """
+    Acceleration contribution G * m * delta / (|delta| + softening)^3.
+    This is the additive softening the experiment scripts always used.
+    """
+    return (g_const * masses / (dist + softening) ** 3)[..., None] * delta
+
+
+class DirectSum:
+    """
+    Exact O(N^2) all-pairs gravity, used for validation and small runs.
+
+    Every backend takes `box`: the side of a periodic cube centred on the
+    origin (None for open space). Separations then use the nearest image
+    of each source (minimum-image convention).
+    """
+    name = 'direct'
+
+    def __init__(self, softening=0.5):
+        self.softening = softening
+        self.pairs = 0
+
+    def prepare(self, positions, masses, box=None):
+        """Nothing to precompute for the direct sum."""
+        return None
+
+    def accelerations(self, positions, masses, targets, g_const=1.0, prepared=None, box=None):
+        """
+        Acceleration on each entity in `targets` from all entities. Pair
+        terms are computed in the precision of `positions`, sums in float64.
+        """
+        acc = np.zeros((len(targets), 3))
+        self.pairs = len(targets) * len(positions)
+        if len(targets) == 0:
+            return acc
+        masses = np.asarray(masses, dtype=positions.dtype)
+
+        chunk = max(1, CHUNK_PAIRS // max(len(positions), 1))
+        for start in range(0, len(targets), chunk):
+            rows = targets[start:start + chunk]
+            delta = positions[None, :, :] - positions[rows, None, :]
+            if box is not None:
+                minimum_image(delta, box)
+            dist = np.sqrt(np.einsum('cnd,cnd->cn', delta, delta))
+            pull = softened_pull(delta, dist, masses, g_const, self.softening)
+            # No self-force
+            pull[np.arange(len(rows)), rows] = 0.0
+            acc[start:start + chunk] = pull.sum(axis=1, dtype=np.float64)
+        return acc
+
+
+def _spread_bits(v):
+    """Interleaves two zero bits between each of the low 21 bits of v."""
+    v = v.astype(np.uint64) & np.uint64(0x1FFFFF)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+
+def morton_keys(cells):
+    """63-bit Morton keys for integer cell coordinates in [0, 2^21)."""
+    return (_spread_bits(cells[:, 0]) << np.uint64(2)) | \
+           (_spread_bits(cells[:, 1]) << np.uint64(1)) | _spread_bits(cells[:, 2])
+
+
+class Octree:
+    """
+    Linear octree built from Morton-sorted entities.
+
+    Every node is a contiguous run [start, start + count) of `order`, so
+    node masses and centres of mass for a whole level come out of one
+    np.add.reduceat. Nodes holding at most `leaf_size` entities are not
+    split further.
+    """
+    def __init__(self, positions, masses, leaf_size=8):
+        self.leaf_size = leaf_size
+        lo = positions.min(axis=0)
+        self.box = max(float((positions.max(axis=0) - lo).max()), 1e-12) * (1 + 1e-9)
+        self.lo = lo
+
+        scale = (1 << MAX_DEPTH) / self.box
+        cells = np.clip(((positions - lo) * scale).astype(np.int64), 0, (1 << MAX_DEPTH) - 1)
+        keys = morton_keys(cells)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+        sorted_mass = masses[self.order]
+        weighted = positions[self.order] * sorted_mass[:, None]
+
+        levels = []
+        starts = np.zeros(1, dtype=np.int64)
+        for level in range(MAX_DEPTH + 1):
+            shift = np.uint64(3 * (MAX_DEPTH - level))
+            prefix = self.keys >> shift
+            starts = np.flatnonzero(np.r_[True, prefix[1:] != prefix[:-1]])
+            counts = np.diff(np.r_[starts, len(prefix)])
+            mass = np.add.reduceat(sorted_mass, starts)
+            com = np.add.reduceat(weighted, starts, axis=0)
+            com = np.divide(com, mass[:, None], out=np.zeros_like(com), where=mass[:, None] > 0)
+            levels.append((level, starts, counts, mass, com, prefix[starts], shift))
+            if counts.max() <= leaf_size:
+                break
+
+        self._flatten(levels)
+
+    def _flatten(self, levels):
+        offsets = np.cumsum([0] + [len(lv[1]) for lv in levels])
+        self.start = np.concatenate([lv[1] for lv in levels])
+        self.count = np.concatenate([lv[2] for lv in levels])
+        self.mass = np.concatenate([lv[3] for lv in levels])
+        self.com = np.concatenate([lv[4] for lv in levels])
+        self.prefix = np.concatenate([lv[5] for lv in levels])
+        self.shift = np.concatenate([np.full(len(lv[1]), lv[6], dtype=np.uint64) for lv in levels])
+        self.size = np.concatenate([np.full(len(lv[1]), self.box / (1 << lv[0])) for lv in levels])
+
+        # Children of a node at level L are the level L+1 nodes whose runs
+        # start inside the parent's run.
+        self.child_start = np.zeros(len(self.start), dtype=np.int64)
+        self.child_count = np.zeros(len(self.start), dtype=np.int64)
+        for i in range(len(levels) - 1):
+            parents = slice(offsets[i], offsets[i + 1])
+            below = self.start[offsets[i + 1]:offsets[i + 2]]
+            first = np.searchsorted(below, self.start[parents], side='left')
+            last = np.searchsorted(below, self.start[parents] + self.count[parents], side='left')
+            split = self.count[parents] > self.leaf_size
+            self.child_start[parents] = np.where(split, offsets[i + 1] + first, 0)
+            self.child_count[parents] = np.where(split, last - first, 0)
+
+    def target_keys(self, points):
+        scale = (1 << MAX_DEPTH) / self.box
+        cells = np.clip(((points - self.lo) * scale).astype(np.int64), 0, (1 << MAX_DEPTH) - 1)
+        return morton_keys(cells)
+
+
+class BarnesHut:
+    """
+    Barnes-Hut octree gravity, O(N log N) per step.
+
+    A node is treated as a point mass at its centre of mass when
+    size / distance < opening_angle and the target is not inside it;
+    otherwise it is opened, and leaves are summed exactly. The tree walk
+    runs over all (target, node) pairs of a frontier at once.
+    opening_angle=0 reproduces the direct sum. In a periodic box nodes and
+    leaf members are taken at their nearest image, and nodes reaching past
+    half a box from the target are always opened.
+    """
+    name = 'barnes_hut'
+
+    def __init__(self, opening_angle=0.5, softening=0.5, leaf_size=8, chunk=16384):
+        self.opening_angle = opening_angle
+        self.softening = softening
+        self.leaf_size = leaf_size
+        self.chunk = chunk
+        self.pairs = 0
+
+    def prepare(self, positions, masses, box=None):
+        """The octree, which can be shared by any number of target blocks."""
+        return Octree(positions, masses, self.leaf_size)
+
+    def accelerations(self, positions, masses, targets, g_const=1.0, prepared=None, box=None):
+        """Accelerations of `targets`; pairs counts the node and leaf interactions evaluated."""
+        acc = np.zeros((len(targets), 3))
+        self.pairs = 0
+        if len(targets) == 0 or len(positions) == 0:
+            return acc
+
+        tree = self.prepare(positions, masses) if prepared is None else prepared
+        masses = np.asarray(masses, dtype=positions.dtype)
+        for start in range(0, len(targets), self.chunk):
+            rows = np.asarray(targets[start:start + self.chunk])
+            acc[start:start + len(rows)] = self._walk(tree, positions, masses, rows, g_const, box)
+        return acc
+
+    def _walk(self, tree, positions, masses, rows, g_const, box=None):
+        acc = np.zeros((len(rows), 3))
+        points = positions[rows]
+        point_keys = tree.target_keys(points)
+
+        # Frontier of (local target index, node) pairs, starting at the root
+        t = np.arange(len(rows))
+        node = np.zeros(len(rows), dtype=np.int64)
+        while len(t):
+            delta = tree.com[node] - points[t]
+            if box is not None:
+                minimum_image(delta, box)
+            dist = np.sqrt(np.einsum('pd,pd->p', delta, delta))
+            inside = (point_keys[t] >> tree.shift[node]) == tree.prefix[node]
+            far = ~inside & (tree.size[node] < self.opening_angle * dist)
+            if box is not None:
+                # A node straddling the half-box shell has members on both
+                # sides of the nearest image: open it
+                far &= (np.abs(delta) + tree.size[node][:, None] <= 0.5 * box).all(axis=1)
+            leaf = ~far & (tree.child_count[node] == 0)
+
+            # 1. Far nodes: monopole approximation
+            self._accumulate(acc, t[far], delta[far], dist[far], tree.mass[node[far]], g_const)
+
+            # 2. Leaves: exact sum over their members (skipping the target itself)
+            lt, ln = t[leaf], node[leaf]
+            counts = tree.count[ln]
+            member_t = np.repeat(lt, counts)
+            offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            member = tree.order[np.repeat(tree.start[ln], counts) + offset]
+            keep = member != rows[member_t]
+            member_t, member = member_t[keep], member[keep]
+            self.pairs += int(far.sum()) + len(member)
+            d = positions[member] - points[member_t]
+            if box is not None:
+                minimum_image(d, box)
+            self._accumulate(acc, member_t, d, np.sqrt(np.einsum('pd,pd->p', d, d)),
+                             masses[member], g_const)
+
+            # 3. Everything else is opened into its children
+            opened = ~far & ~leaf
+            ot, on = t[opened], node[opened]
+            kids = tree.child_count[on]
+            t = np.repeat(ot, kids)
+            offset = np.arange(kids.sum()) - np.repeat(np.cumsum(kids) - kids, kids)
+            node = np.repeat(tree.child_start[on], kids) + offset
+        return acc
+
+    def _accumulate(self, acc, t, delta, dist, mass, g_const):
+        if len(t) == 0:
+            return
+        pull = softened_pull(delta, dist, mass, g_const, self.softening)
+        for axis in range(3):
+            acc[:, axis] += np.bincount(t, weights=pull[:, axis], minlength=len(acc))
+
+
+FORCE_BACKENDS = {
+    DirectSum.name: DirectSum,
+    BarnesHut.name: BarnesHut,
+    ParticleMesh.name: ParticleMesh,
+}
+
+
+def make_force_backend(backend='direct', **options):
+    """Looks up a force backend by name; instances are passed through."""
+    if not isinstance(backend, str):
+        return backend
+    try:
+        return FORCE_BACKENDS[backend](**options)
+    except KeyError:
+        raise ValueError(f"Unknown force backend: {backend}") from None
@@ -0,0 +1,144 @@
+import numpy as np
+
+# Geometries are evaluated in chunks holding at most this many
+# (geometry x layer separation) terms at once.
+CHUNK_TERMS = 1 << 24
+
+# Order of the geometry parameters in gradients and optimize_helix().
+PARAMETERS = ('twist', 'rise', 'radius')
+
+
+def pair_energy(d2):
+    """Lennard-Jones style flow potential on squared distances: d^-12 - d^-6."""
+    inv6 = 1.0 / (d2 * d2 * d2)
+    return inv6 * inv6 - inv6
+
+
+def _pair_slope(d2):
+    """d(pair_energy) / d(d^2)."""
+    inv2 = 1.0 / d2
+    inv6 = inv2 * inv2 * inv2
+    return (-6.0 * inv6 * inv6 + 3.0 * inv6) * inv2
+
+
+def helix_coordinates(twist_deg, rise, radius, n_layers):
+    """Base positions of both strands, (n_layers, 2, 3); strand B is opposite strand A."""
+    theta = np.deg2rad(twist_deg) * np.arange(n_layers)[:, None] + np.array([0.0, np.pi])
+    z = np.broadcast_to((rise * np.arange(n_layers))[:, None], theta.shape)
+    return np.stack([radius * np.cos(theta), radius * np.sin(theta), z], axis=-1)
+
+
+def _separations(n_layers, cutoff, rise):
+    """Layer separations m with their multiplicity (n - m) in the pair sum."""
+    m = np.arange(1, n_layers, dtype=float)
+    if cutoff is not None:
+        m = m[m * np.min(rise) <= cutoff]
+    return m, n_layers - m
+
+
+def _terms(twist, rise, radius, m):
+    """Squared distances (same strand, opposite strand) for each geometry and separation."""
+    angle = m * twist[..., None]
+    height = (m * rise[..., None]) ** 2
+    r2 = 2 * radius[..., None] ** 2
+    cos = np.cos(angle)
+    return r2 * (1 - cos) + height, r2 * (1 + cos) + height, angle
+
+
+def helix_energy(twist_deg, rise, radius, n_layers=20, cutoff=None):
+    """
+    Total interlayer energy of an n-layer double helix: the pair potential
+    summed over every pair of bases in different layers, on both strands.
+
+    On a helix the distance between two bases depends only on their layer
+    separation m and whether they sit on the same strand, so the O(n^2)
+    pair sum collapses to
+
+        E = sum_m (n - m) * 2 * [u(d_same(m)) + u(d_opposite(m))]
+        d^2 = 2 r^2 (1 -+ cos(m * twist)) + (m * rise)^2
+
+    Inputs broadcast against each other, so a whole grid of geometries is
+    evaluated at once. `cutoff` drops separations with m * rise beyond it
+    (useful for chains of thousands of layers).
+    Returns: energy with the broadcast shape of the inputs
+    """
+    twist, rise, radius = np.broadcast_arrays(np.deg2rad(np.asarray(twist_deg, dtype=float)),
+                                              np.asarray(rise, dtype=float),
+                                              np.asarray(radius, dtype=float))
+    shape = twist.shape
+    twist, rise, radius = twist.ravel(), rise.ravel(), radius.ravel()
+    m, weight = _separations(n_layers, cutoff, rise)
+
+    energy = np.empty(len(twist))
+    chunk = max(1, CHUNK_TERMS // max(len(m), 1))
+    for start in range(0, len(twist), chunk):
+        part = slice(start, start + chunk)
+        same, opposite, _ = _terms(twist[part], rise[part], radius[part], m)
+        energy[part] = 2 * (pair_energy(same) + pair_energy(opposite)) @ weight
+    return energy.reshape(shape)
+
+
+def helix_gradient(twist_deg, rise, radius, n_layers=20, cutoff=None):
+    """
+    Energy and its analytic gradient with respect to (twist in degrees,
+    rise, radius) for one geometry.
+    Returns: energy, gradient (3,)
+    """
+    twist = np.deg2rad(float(twist_deg))
+    rise, radius = float(rise), float(radius)
+    m, weight = _separations(n_layers, cutoff, rise)
+    same, opposite, angle = _terms(np.array(twist), np.array(rise), np.array(radius), m)
+
+    slope_same, slope_opp = _pair_slope(same), _pair_slope(opposite)
+    sin, cos = np.sin(angle), np.cos(angle)
+    # d(d^2)/d(param) for same / opposite strand
+    d_twist = 2 * radius ** 2 * m * sin
+    d_rise = 2 * m * m * rise
+    d_radius = 4 * radius
+    gradient = 2 * np.array([
+        (slope_same * d_twist - slope_opp * d_twist) @ weight * np.pi / 180,
+        ((slope_same + slope_opp) * d_rise) @ weight,
+        (slope_same * d_radius * (1 - cos) + slope_opp * d_radius * (1 + cos)) @ weight,
+    ])
+    energy = 2 * (pair_energy(same) + pair_energy(opposite)) @ weight
+    return float(energy), gradient
+
+
+def optimize_helix(twist_deg, rise, radius, n_layers=20, free=PARAMETERS, cutoff=None,
+                   steps=500, tol=1e-10):
+    """
+    Gradient refinement of a helix geometry (e.g. the best point of a grid
+    scan): steepest descent with backtracking line search over the
+    parameters named in `free`; the others stay fixed. Rise and radius are
+    kept positive.
+    Returns: dict with twist, rise, radius, energy and iterations
+    """
+    x = np.array([twist_deg, rise, radius], dtype=float)
+    mask = np.array([name in free for name in PARAMETERS], dtype=float)
+    energy, grad = helix_gradient(*x, n_layers, cutoff)
+    step = 1.0
+    iterations = 0
+    for iterations in range(1, steps + 1):
+        direction = -grad * mask
+        norm2 = direction @ direction
+        if norm2 < tol:
+            break
+        # Backtrack until the energy drops enough (Armijo condition)
+        while True:
+            trial = x + step * direction
+            if trial[1] > 0 and trial[2] > 0:
+                trial_energy, trial_grad = helix_gradient(*trial, n_layers, cutoff)
+                if trial_energy <= energy - 1e-4 * step * norm2:
+                    break
+            step *= 0.5
+            if step < 1e-16:
+                break
+        if step < 1e-16:
+            break
+        converged = energy - trial_energy < tol * max(abs(energy), 1.0)
+        x, energy, grad = trial, trial_energy, trial_grad
+        step *= 2.0
+        if converged:
+            break
+    return {'twist': float(x[0]), 'rise': float(x[1]), 'radius': float(x[2]),
+            'energy': energy, 'iterations': iterations}
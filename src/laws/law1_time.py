@@ -0,0 +1,17 @@
+import numpy as np
+
+# Coupling between local density and the slowing of time.
+GAMMA = 0.5
+
+
+def time_dilation(density, gamma=GAMMA):
+    """
+    LAW 1 CORE: Rate of time flow relative to vacuum, 1 / (1 + gamma * rho).
+    Time flows slower in high density. Works elementwise on arrays.
+    """
+    return 1.0 / (1.0 + gamma * np.asarray(density, dtype=float))
+
+
+def effective_dt(dt, density, gamma=GAMMA):
+    """dt_eff = dt / (1 + gamma * rho)"""
+    return dt * time_dilation(density, gamma)
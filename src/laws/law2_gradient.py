@@ -0,0 +1,80 @@
+import numpy as np
+
+from ..periodic import minimum_image
+
+# Targets are processed in chunks so that each (targets x entities) block
+# holds roughly this many pair entries, bounding temporary memory.
+CHUNK_PAIRS = 1 << 22
+
+
+def linear_kernel_density_gradient(points, positions, masses, radius, exclude=None, index=None,
+                                   stats=None, box=None):
+    """
+    LAW 2 KERNEL: density and its analytic gradient for many points at once.
+
+        rho(x)      = sum_j m_j * (1 - |x - x_j| / R)        for |x - x_j| < R
+        grad rho(x) = sum_j (m_j / R) * (x_j - x) / |x - x_j|
+
+    `exclude` optionally gives, per point, the entity index to leave out
+    (the point's own entity), or -1 for none. An entity sitting exactly on
+    a point counts towards density but not the gradient (the kernel peak
+    has no direction). With a neighbour `index` (see src/neighbors.py) only
+    pairs inside the cutoff are visited; otherwise all pairs are scanned.
+    If a `stats` dict is given, stats['pairs'] counts the pairs evaluated.
+    With a periodic `box` (cube side) separations use the nearest image.
+    Pair terms use the precision of `positions` (e.g. float32), sums float64.
+    Returns: density (M,), gradient (M, 3)
+    """
+    points = np.asarray(points, dtype=positions.dtype).reshape(-1, 3)
+    m = len(points)
+    density = np.zeros(m)
+    grad = np.zeros((m, 3))
+    if stats is not None:
+        stats['pairs'] = stats.get('pairs', 0)
+    if m == 0 or len(positions) == 0:
+        return density, grad
+
+    if index is not None:
+        qi, ej = index.query(points, radius)
+        if exclude is not None:
+            keep = ej != np.asarray(exclude)[qi]
+            qi, ej = qi[keep], ej[keep]
+        if stats is not None:
+            stats['pairs'] += len(qi)
+
+        delta = positions[ej] - points[qi]
+        if box is not None:
+            minimum_image(delta, box)
+        dist = np.sqrt(np.einsum('pd,pd->p', delta, delta))
+        density = np.bincount(qi, weights=masses[ej] * (1 - dist / radius), minlength=m)
+
+        pull = np.divide(masses[ej] / radius, dist, out=np.zeros_like(dist), where=dist > 0)
+        for axis in range(3):
+            grad[:, axis] = np.bincount(qi, weights=pull * delta[:, axis], minlength=m)
+        return density, grad
+
+    if stats is not None:
+        stats['pairs'] += m * len(positions)
+    masses = np.asarray(masses, dtype=positions.dtype)
+    chunk = max(1, CHUNK_PAIRS // len(positions))
+    for start in range(0, m, chunk):
+        stop = min(start + chunk, m)
+        delta = positions[None, :, :] - points[start:stop, None, :]
+        if box is not None:
+            minimum_image(delta, box)
+        dist = np.sqrt(np.einsum('cnd,cnd->cn', delta, delta))
+
+        inside = dist < radius
+        if exclude is not None:
+            own = np.asarray(exclude[start:stop])
+            rows = np.nonzero(own >= 0)[0]
+            inside[rows, own[rows]] = False
+
+        density[start:stop] = np.where(inside, masses * (1 - dist / radius), 0.0).sum(
+            axis=1, dtype=np.float64)
+
+        pull = np.divide(masses / radius, dist,
+                         out=np.zeros_like(dist), where=inside & (dist > 0))
+        grad[start:stop] = np.einsum('cn,cnd->cd', pull, delta, dtype=np.float64)
+
+    return density, grad
@@ -0,0 +1,144 @@
+import numpy as np
+
+from ..neighbors import build_neighbor_index
+
+# Range of the Law-2 density kernel that pulls entities together.
+INTERACTION_RADIUS = 2.0
+
+# Entities closer than this are bonded (belong to the same structure).
+BOND_RADIUS = 1.0
+
+# Langevin friction coefficient (1 / relaxation time of the thermostat).
+FRICTION = 1.0
+
+
+def law2_accelerations(system, radius=INTERACTION_RADIUS):
+    """Law-2 motion up the density gradient: acc = g_const * grad rho."""
+    moving = np.flatnonzero(~system.fixed)
+    system.acc[:] = 0.0
+    _, grad, _ = system.density_gradient(moving, radius)
+    system.acc[moving] = system.g_const * grad
+    return system.acc
+
+
+def reflect(system, box):
+    """Reflecting walls at +-box on every axis."""
+    pos, vel = system.pos, system.vel
+    for bound in (box, -box):
+        out = pos > box if bound > 0 else pos < -box
+        pos[out] = 2 * bound - pos[out]
+        vel[out] = -vel[out]
+
+
+def langevin_step(system, dt, temperature, friction=FRICTION, radius=INTERACTION_RADIUS,
+                  rng=None, box=None):
+    """
+    LAW 3 DYNAMICS: one BAOAB Langevin step at `temperature` (k_B = 1).
+
+        B: v += a dt/2    A: x += v dt/2    O: v = c v + sqrt((1 - c^2) T / m) xi
+        A: x += v dt/2    (new forces)      B: v += a dt/2,        c = exp(-friction dt)
+
+    system.acc must hold the current accelerations (law2_accelerations()).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    moving = ~system.fixed
+    half = 0.5 * dt
+    c = np.exp(-friction * dt)
+    sigma = np.sqrt((1 - c * c) * temperature / system.mass[moving])[:, None]
+
+    system.vel[moving] += system.acc[moving] * half
+    system.pos[moving] += system.vel[moving] * half
+    system.vel[moving] = c * system.vel[moving] + sigma * rng.standard_normal((len(sigma), 3))
+    system.pos[moving] += system.vel[moving] * half
+    if box is not None:
+        reflect(system, box)
+    system.mark_moved()
+    law2_accelerations(system, radius)
+    system.vel[moving] += system.acc[moving] * half
+
+
+def thermalize(system, temperature, steps=300, dt=0.1, friction=FRICTION,
+               radius=INTERACTION_RADIUS, rng=None, box=None):
+    """Runs `steps` Langevin steps at `temperature`, starting from Maxwell velocities."""
+    rng = np.random.default_rng() if rng is None else rng
+    moving = ~system.fixed
+    system.vel[moving] = rng.standard_normal((moving.sum(), 3)) * \
+        np.sqrt(temperature / system.mass[moving])[:, None]
+    law2_accelerations(system, radius)
+    for _ in range(steps):
+        langevin_step(system, dt, temperature, friction, radius, rng, box)
+    return system
+
+
+def bond_pairs(positions, radius=BOND_RADIUS, method='auto'):
+    """All pairs (i < j) closer than `radius`, from a neighbour index."""
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    i, j = build_neighbor_index(positions, radius, method).query(positions, radius)
+    keep = i < j
+    return i[keep], j[keep]
+
+
+def union_find(n, i, j):
+    """
+    Connected components of the graph with edges (i, j), by vectorized
+    union-find: every round hooks the larger root of each edge onto the
+    smaller one, then compresses paths by pointer jumping until every
+    entity points straight at its root.
+    Returns: root label per entity (the smallest index in its component)
+    """
+    parent = np.arange(n)
+    while True:
+        ri, rj = parent[i], parent[j]
+        split = ri != rj
+        if not split.any():
+            return parent
+        lo, hi = np.minimum(ri[split], rj[split]), np.maximum(ri[split], rj[split])
+        np.minimum.at(parent, hi, lo)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+def connected_clusters(positions, radius=BOND_RADIUS, method='auto'):
+    """Cluster label (0 .. k-1) of every entity; bonded entities share one."""
+    i, j = bond_pairs(positions, radius, method)
+    _, labels = np.unique(union_find(len(positions), i, j), return_inverse=True)
+    return labels
+
+
+def cluster_sizes(labels):
+    """Size of every cluster, largest first."""
+    return np.sort(np.bincount(labels))[::-1]
+
+
+def size_distribution(labels):
+    """Number of clusters of each size s (index s of the result)."""
+    return np.bincount(cluster_sizes(labels))
+
+
+def structure_fraction(labels, min_size=2):
+    """Fraction of entities that belong to a cluster of at least `min_size`."""
+    if len(labels) == 0:
+        return 0.0
+    sizes = np.bincount(labels)
+    return float((sizes[labels] >= min_size).mean())
+
+
+def critical_temperature(temps, structure):
+    """
+    Temperature where structure, coming down from the hot side, first
+    crosses half way between its lowest and highest value (linearly
+    interpolated between the bracketing temperatures).
+    """
+    temps = np.asarray(temps, dtype=float)
+    order = np.argsort(temps)[::-1]
+    t, s = temps[order], np.asarray(structure, dtype=float)[order]
+    half = 0.5 * (s.min() + s.max())
+    k = int(np.argmax(s >= half))
+    if k == 0:
+        return t[0]
+    f = (half - s[k - 1]) / (s[k] - s[k - 1])
+    return t[k - 1] + f * (t[k] - t[k - 1])
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from .gravity import CHUNK_PAIRS as FORCE_CHUNK_PAIRS
+from .laws.law2_gradient import CHUNK_PAIRS as DENSITY_CHUNK_PAIRS
+from .neighbors import INDEX_MIN_ENTITIES, QUERY_CHUNK
+
+# Budget for new systems when none is given: bytes or a size such as '8G'.
+# None (unset) means unlimited.
+MEMORY_BUDGET = os.environ.get('QGU_MEMORY_BUDGET')
+
+# Neighbours per entity assumed for cutoff density queries.
+MEAN_NEIGHBORS = 64
+
+# Cell-list candidates per true neighbour: 27 cells of side r around a
+# sphere of radius r.
+CANDIDATE_RATIO = 27 / (4 * np.pi / 3)
+
+# Barnes-Hut frontier width (nodes in flight per target) assumed for the walk.
+TREE_FRONTIER = 256
+
+_UNITS = {'': 1, 'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30, 'T': 2 ** 40}
+
+
+def parse_bytes(size):
+    """Bytes from an int or a string like '512M', '8G', '1.5TB'; None stays None."""
+    if size is None or isinstance(size, (int, float, np.integer, np.floating)):
+        return None if size is None else int(size)
+    text = str(size).strip().upper().rstrip('B').rstrip('I')
+    unit = text[-1] if text and text[-1] in _UNITS else ''
+    return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def estimate_memory(n, dtype=np.float64, force_backend='direct', neighbor_method='auto',
+                    mean_neighbors=MEAN_NEIGHBORS, workers=0, periodic=False):
+    """
+    Approximate peak footprint of a QGU run with `n` entities, per part:
+
+        state      entity columns (pos/vel/acc/density/dilation in `dtype`,
+                   mass float64, fixed flag)
+        forces     force backend working set: all-pairs chunk, octree plus
+                   walk frontier, or mesh grids and cached kernel transforms
+        density    cutoff density / gradient query (pair lists, gathered
+                   separations) or the all-pairs chunk without an index
+        neighbors  neighbour index arrays
+
+    Force and density evaluation never overlap, so the total is state +
+    neighbors + the larger of the two. Temporaries are counted once per
+    worker process. `force_backend` is a name or a backend instance (its
+    grid_size / leaf_size / dtype are used). Periodic meshes need no padding.
+    Returns: dict of bytes per part plus 'total'
+    """
+    n = int(n)
+    f = np.dtype(dtype).itemsize
+    name = force_backend if isinstance(force_backend, str) else force_backend.name
+    copies = max(1, workers or 0)
+
+    parts = {'state': n * (11 * f + 8 + 1)}
+
+    if name == 'direct':
+        pairs = max(FORCE_CHUNK_PAIRS, n)
+        forces = pairs * 7 * f + n * 3 * 8
+    elif name == 'barnes_hut':
+        leaf = getattr(force_backend, 'leaf_size', 8)
+        chunk = min(n, getattr(force_backend, 'chunk', 16384))
+        nodes = 2 * n // leaf + 1
+        # node moments are float64, so the walk frontier is too
+        forces = nodes * 13 * 8 + n * 4 * 8 + chunk * TREE_FRONTIER * 14 * 8
+    elif name == 'particle_mesh':
+        g = getattr(force_backend, 'grid_size', 64)
+        mesh_f = np.dtype(getattr(force_backend, 'dtype', None) or dtype).itemsize
+        stencil = 27 if getattr(force_backend, 'assignment', 'cic') == 'tsc' else 8
+        padded = g ** 3 if periodic else (2 * g) ** 3
+        forces = (10 * padded * 8              # transforms (FFTs run in float64)
+                  + 4 * padded * mesh_f        # density and gradient fields
+                  + g ** 3 * 8                 # deposit
+                  + n * stencil * 16)          # stencil cells and weights
+    else:
+        raise ValueError(f"Unknown force backend: {name}")
+    parts['forces'] = forces * copies
+
+    indexed = neighbor_method is not None and not (neighbor_method == 'auto'
+                                                   and n < INDEX_MIN_ENTITIES)
+    if indexed:
+        pairs = n * mean_neighbors
+        candidates = min(n, QUERY_CHUNK) * mean_neighbors * CANDIDATE_RATIO
+        parts['density'] = int(pairs * (2 * 8 + 4 * f + 4 * 8)
+                               + candidates * (2 * 8 + 4 * f + 1)) * copies
+        parts['neighbors'] = n * (3 * 8 + 3 * 8)
+    else:
+        parts['density'] = max(DENSITY_CHUNK_PAIRS, n) * 6 * f * copies
+        parts['neighbors'] = 0
+
+    parts['total'] = parts['state'] + parts['neighbors'] + max(parts['forces'], parts['density'])
+    return parts
+
+
+def check_budget(estimate, budget, what="run"):
+    """Raises MemoryError with the breakdown if the estimate exceeds `budget`."""
+    budget = parse_bytes(budget)
+    if budget is None or estimate['total'] <= budget:
+        return estimate
+    detail = ', '.join(f"{part} {format_bytes(size)}" for part, size in estimate.items()
+                       if part != 'total')
+    raise MemoryError(f"Planned {what} needs ~{format_bytes(estimate['total'])} "
+                      f"({detail}), over the {format_bytes(budget)} budget")
@@ -0,0 +1,225 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# QGU LEARNING RULE defaults: every signal lowers the resistance of the
+# edges it used by LEARNING_RATE, never below MIN_RESISTANCE.
+LEARNING_RATE = 0.05
+MIN_RESISTANCE = 0.1
+
+# Batched Dijkstra runs at most this many (source x neuron) predecessor
+# entries at once.
+CHUNK_TREES = 1 << 24
+
+
+class MindNetwork:
+    """
+    Liquid-brain graph stored as flat arrays.
+
+    Edges are undirected: u, v, resistance and flow_count are parallel
+    arrays of length E. The adjacency is kept in CSR form (both directions,
+    rows sorted) together with the edge id of every CSR entry, so the
+    weighted matrix for scipy's Dijkstra is refreshed by one gather of the
+    resistance array. networkx is only needed for to_networkx() / drawing.
+
+    Only the edges a signal travelled get cheaper, and a shortest path stays
+    shortest when only its own edges get cheaper (every other path gains at
+    most the same reduction). Repeated signals between the same neurons
+    therefore reuse the last path instead of rerunning Dijkstra, until some
+    other change invalidates it.
+    """
+    def __init__(self, num_neurons, u, v, resistance=1.0):
+        u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+        self.num_neurons = int(num_neurons)
+        self.u, self.v = np.minimum(u, v), np.maximum(u, v)
+        self.resistance = np.broadcast_to(np.asarray(resistance, dtype=float), u.shape).copy()
+        self.flow_count = np.zeros(len(u), dtype=np.int64)
+        self.dijkstra_runs = 0
+        self._cached_path = None
+
+        # CSR over both directions, rows (then columns) sorted
+        rows = np.concatenate([self.u, self.v])
+        cols = np.concatenate([self.v, self.u])
+        self._entry_keys = rows * self.num_neurons + cols
+        order = np.argsort(self._entry_keys)
+        self._entry_keys = self._entry_keys[order]
+        self._entry_edge = np.concatenate([np.arange(len(u))] * 2)[order]
+        indptr = np.zeros(self.num_neurons + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.num_neurons), out=indptr[1:])
+        self._matrix = csr_matrix((self.resistance[self._entry_edge], cols[order], indptr),
+                                  shape=(self.num_neurons,) * 2)
+
+    @classmethod
+    def random(cls, num_neurons, mean_degree=6.0, seed=None, resistance=1.0):
+        """Sparse random graph with about `mean_degree` connections per neuron."""
+        rng = np.random.default_rng(seed)
+        a, b = rng.integers(0, num_neurons, (2, int(num_neurons * mean_degree / 2)))
+        keys = np.sort(np.minimum(a, b) * num_neurons + np.maximum(a, b))
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+        u, v = np.divmod(keys, num_neurons)
+        keep = u != v
+        return cls(num_neurons, u[keep], v[keep], resistance)
+
+    @classmethod
+    def from_networkx(cls, graph, resistance=1.0):
+        """Imports a networkx graph whose nodes are 0 .. n-1."""
+        edges = np.array(list(graph.edges()), dtype=np.int64).reshape(-1, 2)
+        return cls(graph.number_of_nodes(), edges[:, 0], edges[:, 1], resistance)
+
+    def to_networkx(self):
+        """networkx Graph with resistance / flow_count edge attributes (for export and drawing)."""
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.num_neurons))
+        graph.add_edges_from((int(a), int(b), {'resistance': float(r), 'flow_count': int(c)})
+                             for a, b, r, c in zip(self.u, self.v, self.resistance, self.flow_count))
+        return graph
+
+    @property
+    def num_edges(self):
+        return len(self.u)
+
+    def matrix(self):
+        """CSR matrix of current resistances (shared structure, refreshed data)."""
+        self._matrix.data = self.resistance[self._entry_edge]
+        return self._matrix
+
+    def edge_ids(self, a, b):
+        """Edge id of each (a[k], b[k]) connection; -1 where there is none."""
+        keys = np.asarray(a, dtype=np.int64) * self.num_neurons + np.asarray(b, dtype=np.int64)
+        slot = np.minimum(np.searchsorted(self._entry_keys, keys), len(self._entry_keys) - 1)
+        found = self._entry_keys[slot] == keys
+        return np.where(found, self._entry_edge[slot], -1)
+
+    def path_edges(self, path):
+        path = np.asarray(path, dtype=np.int64)
+        return self.edge_ids(path[:-1], path[1:])
+
+    def shortest_path(self, source, target):
+        """Least-resistance path source -> target as a list of neurons, or None."""
+        if self._cached_path is not None and self._cached_path[0] == (source, target):
+            return list(self._cached_path[1])
+
+        _, predecessors = dijkstra(self.matrix(), directed=True, indices=source,
+                                   return_predecessors=True)
+        self.dijkstra_runs += 1
+        if source != target and predecessors[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(predecessors[path[-1]]))
+        path.reverse()
+        self._cached_path = ((source, target), path)
+        return list(path)
+
+    def reinforce(self, edges, learning_rate=LEARNING_RATE, floor=MIN_RESISTANCE):
+        """
+        Hebb's Law / Flow Erosion on the given edge ids: resistance drops by
+        learning_rate per use (down to `floor`), flow_count goes up.
+        """
+        edges = np.asarray(edges, dtype=np.int64)
+        cached = self._cached_path
+        if cached is None or not np.array_equal(np.sort(edges), np.sort(self.path_edges(cached[1]))):
+            self._cached_path = None
+        uses = np.bincount(edges, minlength=self.num_edges)
+        self.resistance = np.maximum(floor, self.resistance - learning_rate * uses)
+        self.flow_count += uses
+
+    def trace_paths(self, sources, targets, chunk=CHUNK_TREES):
+        """
+        Least-resistance paths for a batch of (source, target) signals from
+        one multi-source Dijkstra call per chunk of distinct sources. The
+        paths are walked back from every target at once along the
+        predecessor trees. The graph is undirected, so the trees are grown
+        from whichever side (sources or targets) has fewer distinct neurons.
+        Returns: edge ids of all paths (concatenated), the signal each edge
+        belongs to, and hops per signal (-1 where there is no path)
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(np.unique(targets)) < len(np.unique(sources)):
+            sources, targets = targets, sources
+        unique_sources, tree = np.unique(sources, return_inverse=True)
+        hops = np.full(len(sources), -1, dtype=np.int64)
+        edge_parts, signal_parts = [], []
+        per_chunk = max(1, chunk // self.num_neurons)
+        for start in range(0, len(unique_sources), per_chunk):
+            block = unique_sources[start:start + per_chunk]
+            _, predecessors = dijkstra(self.matrix(), directed=True, indices=block,
+                                       return_predecessors=True)
+            self.dijkstra_runs += len(block)
+            signals = np.flatnonzero((tree >= start) & (tree < start + len(block)))
+            rows = tree[signals] - start
+            reached = (predecessors[rows, targets[signals]] >= 0) | \
+                (sources[signals] == targets[signals])
+            hops[signals[reached]] = 0
+
+            active = np.flatnonzero(reached & (sources[signals] != targets[signals]))
+            current = targets[signals].copy()
+            while len(active):
+                previous = predecessors[rows[active], current[active]]
+                edge_parts.append(self.edge_ids(previous, current[active]))
+                signal_parts.append(signals[active])
+                hops[signals[active]] += 1
+                current[active] = previous
+                active = active[previous != sources[signals[active]]]
+
+        if not edge_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), hops
+        return np.concatenate(edge_parts), np.concatenate(signal_parts), hops
+
+    def set_resistance(self, edges, values):
+        self.resistance[edges] = values
+        self._cached_path = None
+
+    def train(self, source, target, iterations=50, learning_rate=LEARNING_RATE,
+              floor=MIN_RESISTANCE):
+        """
+        Sends `iterations` signals source -> target, each along the current
+        least-resistance path, eroding the edges it used.
+        Returns: path_history (list of neuron lists, ending with None if
+        the target is unreachable)
+        """
+        path_history = []
+        for _ in range(iterations):
+            path = self.shortest_path(source, target)
+            if path is None:
+                path_history.append(None)
+                break
+            path_history.append(path)
+            self.reinforce(self.path_edges(path), learning_rate, floor)
+        return path_history
+
+    def train_batch(self, sources, targets, epochs=1, learning_rate=LEARNING_RATE,
+                    floor=MIN_RESISTANCE, order='batch', rng=None):
+        """
+        Learns many memories at once: every epoch sends one signal per
+        (source, target) pair.
+
+        order='batch':      all paths are found on the epoch's starting
+                            resistances and eroded together with one
+                            scatter-add (bincount) over the edge arrays. The
+                            result does not depend on the order of the pairs.
+        order='sequential': signals are sent one after another, each seeing
+                            the erosion of the previous ones, in the given
+                            order, or shuffled every epoch when an `rng`
+                            (np.random.Generator) is passed.
+        Returns: hops per epoch and signal, (epochs, signals); -1 = no path
+        """
+        if order not in ('batch', 'sequential'):
+            raise ValueError(f"Unknown training order: {order}")
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        hops = np.empty((epochs, len(sources)), dtype=np.int64)
+        for epoch in range(epochs):
+            if order == 'batch':
+                edges, _, hops[epoch] = self.trace_paths(sources, targets)
+                self.reinforce(edges, learning_rate, floor)
+                continue
+            sequence = np.arange(len(sources)) if rng is None else rng.permutation(len(sources))
+            for k in sequence:
+                path = self.shortest_path(int(sources[k]), int(targets[k]))
+                hops[epoch, k] = -1 if path is None else len(path) - 1
+                if path is not None:
+                    self.reinforce(self.path_edges(path), learning_rate, floor)
+        return hops
@@ -0,0 +1,285 @@
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy is optional; the cell grid works without it
+    cKDTree = None
+
+from .periodic import minimum_image, wrap_positions
+
+# Query points are processed in chunks of this size to bound the number of
+# candidate pairs held in memory at once.
+QUERY_CHUNK = 65536
+
+# 'auto' falls back to a KD-tree when the fullest grid cell holds this many
+# times more entities than the average occupied cell (e.g. Gaussian cores).
+CLUSTERING_RATIO = 8.0
+
+# Below this many entities 'auto' skips the index: a plain all-pairs scan
+# beats building one.
+INDEX_MIN_ENTITIES = 512
+
+# Empty cells kept around the occupied region of a CellList grid.
+GRID_PADDING = 2
+
+# Grids with at most this many cells per entity keep a dense table of
+# cell starts, so lookups are array indexing instead of binary searches.
+DENSE_CELLS_PER_ENTITY = 64
+
+# The 27 cell offsets covering a cell and all of its neighbours.
+_OFFSETS = np.array([(i, j, k) for i in (-1, 0, 1)
+                     for j in (-1, 0, 1) for k in (-1, 0, 1)])
+
+
+class CellList:
+    """
+    Uniform grid of cubic cells with side equal to the kernel radius.
+
+    Entities are kept sorted by cell so every cell is a contiguous run of
+    `order`. update() only re-sorts when at least one entity has crossed
+    into a different cell, and then starts from the previous order so the
+    (nearly sorted) re-sort is cheap.
+
+    With a periodic `box` (side of a cube centred on the origin) the grid
+    tiles the box exactly with cells of at least the radius, neighbour
+    cells wrap around, and pairs are measured at their nearest image.
+    """
+    box = None
+    _offsets = _OFFSETS
+
+    def __init__(self, radius, box=None):
+        self.radius = float(radius)
+        self.box = None if box is None else float(box)
+        self.rebuilds = 0
+        self._cells = None
+
+    def _cell_coords(self, positions):
+        if self.box is not None:
+            coords = np.floor((positions + 0.5 * self.box) / self._side).astype(np.int64)
+            return coords % self._dims
+        return np.floor(positions / self.radius).astype(np.int64)
+
+    def _keys(self, coords):
+        shifted = coords - self._lo
+        return (shifted[:, 0] * self._dims[1] + shifted[:, 1]) * self._dims[2] + shifted[:, 2]
+
+    def build(self, positions):
+        self.positions = positions
+        if self.box is not None:
+            self._build_periodic()
+            return
+        coords = self._cell_coords(positions)
+        # Spare cells on each side so neighbour lookups never wrap around and
+        # entities can drift a little before the grid has to be resized
+        if len(coords) == 0:
+            lo = hi = np.zeros(3, dtype=np.int64)
+        else:
+            lo = coords.min(axis=0) - GRID_PADDING
+            hi = coords.max(axis=0) + GRID_PADDING
+        self._lo, self._dims = lo, hi + 1 - lo
+        self._key_offsets = (_OFFSETS[:, 0] * self._dims[1] + _OFFSETS[:, 1]) * self._dims[2] + _OFFSETS[:, 2]
+        self._cells = coords
+        self._sort(np.argsort(self._keys(coords), kind='stable'))
+
+    def _build_periodic(self):
+        cells = max(int(self.box // self.radius), 1)
+        self._side = self.box / cells
+        self._lo, self._dims = np.zeros(3, dtype=np.int64), np.full(3, cells, dtype=np.int64)
+        # Fewer than 3 cells per side: -1 and +1 are the same cell, visit it once
+        steps = np.array([-1, 0, 1]) if cells >= 3 else np.arange(cells)
+        self._offsets = np.array([(i, j, k) for i in steps for j in steps for k in steps])
+        self._key_offsets = self._keys(self._offsets)
+        self._cells = self._cell_coords(self.positions)
+        self._sort(np.argsort(self._keys(self._cells), kind='stable'))
+
+    def _sort(self, order):
+        self.order = order
+        self.sorted_keys = self._keys(self._cells)[order]
+        self.rebuilds += 1
+
+        cells = int(np.prod(self._dims))
+        self._cell_start = None
+        if cells <= DENSE_CELLS_PER_ENTITY * len(order) + 65536:
+            self._cell_start = np.zeros(cells + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.sorted_keys, minlength=cells), out=self._cell_start[1:])
+
+    def update(self, positions):
+        """Re-syncs with moved entities. Returns True if a re-sort was needed."""
+        if self._cells is None or len(positions) != len(self._cells):
+            self.build(positions)
+            return True
+
+        self.positions = positions
+        coords = self._cell_coords(positions)
+        if np.array_equal(coords, self._cells):
+            return False
+
+        if self.box is None and (np.any(coords <= self._lo) or
+                                 np.any(coords >= self._lo + self._dims - 1)):
+            # Someone left the grid bounds: start over with a new grid
+            self.build(positions)
+            return True
+
+        self._cells = coords
+        keys = self._keys(coords)
+        self._sort(self.order[np.argsort(keys[self.order], kind='stable')])
+        return True
+
+    def candidates(self, points, radius):
+        """Pairs (point index, entity index) whose cells are adjacent."""
+        cell = self._cell_coords(points)
+        if self.box is not None:
+            # Interior cells offset their keys directly; only edge cells wrap
+            keys = self._keys(cell)[:, None] + self._key_offsets
+            edge = np.flatnonzero(np.any((cell == 0) | (cell == self._dims - 1), axis=1))
+            if len(edge):
+                wrapped = (cell[edge, None, :] + self._offsets) % self._dims
+                keys[edge] = self._keys(wrapped.reshape(-1, 3)).reshape(
+                    len(edge), len(self._offsets))
+            keys = keys.ravel()
+            inside = slice(None)
+        elif np.all((cell > self._lo) & (cell < self._lo + self._dims - 1)):
+            # Every neighbour cell is on the grid: offset the keys directly
+            keys = (self._keys(cell)[:, None] + self._key_offsets).ravel()
+            inside = slice(None)
+        else:
+            coords = (cell[:, None, :] + _OFFSETS[None, :, :]).reshape(-1, 3)
+            inside = np.all((coords >= self._lo) & (coords < self._lo + self._dims), axis=1)
+            keys = self._keys(coords[inside])
+
+        if self._cell_start is not None:
+            starts = self._cell_start[keys]
+            counts = self._cell_start[keys + 1] - starts
+        else:
+            starts = np.searchsorted(self.sorted_keys, keys, side='left')
+            counts = np.searchsorted(self.sorted_keys, keys, side='right') - starts
+
+        owner = np.repeat(np.arange(len(points)), len(self._offsets))[inside]
+        total = counts.sum()
+        qi = np.repeat(owner, counts)
+        # Candidate k of a run sits at starts + (k - first candidate of the run)
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        ej = self.order[shift + np.arange(total)]
+        return qi, ej
+
+    def query(self, points, radius):
+        return _filtered_query(self, points, radius)
+
+
+class KDTreeIndex:
+    """
+    KD-tree over entity positions with a Verlet skin.
+
+    The tree is built on reference positions and only rebuilt once some
+    entity has drifted further than `skin` from where it was; queries widen
+    their search by the largest drift and then filter on exact current
+    distances. Adapts to highly clustered layouts where a uniform grid
+    would put most entities in a handful of cells. A periodic `box` uses
+    the tree's own periodic topology (scipy's boxsize).
+    """
+    box = None
+
+    def __init__(self, radius, skin=None, box=None):
+        if cKDTree is None:
+            raise ImportError("KDTreeIndex requires scipy")
+        self.radius = float(radius)
+        self.skin = 0.25 * self.radius if skin is None else float(skin)
+        self.box = None if box is None else float(box)
+        self.rebuilds = 0
+        self._tree = None
+
+    def _tree_coords(self, points):
+        """Periodic trees want coordinates in [0, box)."""
+        if self.box is None:
+            return points
+        shifted = wrap_positions(np.array(points, dtype=float), self.box) + 0.5 * self.box
+        return np.minimum(shifted, np.nextafter(self.box, 0))
+
+    def build(self, positions):
+        self.positions = positions
+        self._ref = positions.copy()
+        if self.box is None:
+            self._tree = cKDTree(self._ref)
+        else:
+            self._tree = cKDTree(self._tree_coords(self._ref), boxsize=self.box)
+        self._drift = 0.0
+        self.rebuilds += 1
+
+    def update(self, positions):
+        if self._tree is None or len(positions) != len(self._ref):
+            self.build(positions)
+            return True
+
+        self.positions = positions
+        delta = positions - self._ref
+        if self.box is not None:
+            minimum_image(delta, self.box)
+        self._drift = np.sqrt(np.einsum('ij,ij->i', delta, delta).max(initial=0.0))
+        if self._drift > self.skin:
+            self.build(positions)
+            return True
+        return False
+
+    def candidates(self, points, radius):
+        hits = self._tree.query_ball_point(self._tree_coords(points), radius + self._drift,
+                                           return_sorted=False)
+        counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        qi = np.repeat(np.arange(len(points)), counts)
+        ej = np.concatenate(hits).astype(np.int64) if counts.sum() else np.zeros(0, dtype=np.int64)
+        return qi, ej
+
+    def query(self, points, radius):
+        return _filtered_query(self, points, radius)
+
+
+def _filtered_query(index, points, radius):
+    """
+    All (point, entity) pairs closer than `radius`, as flat index arrays.
+    """
+    if radius > index.radius:
+        raise ValueError(f"query radius {radius} exceeds index radius {index.radius}")
+
+    points = np.asarray(points, dtype=index.positions.dtype).reshape(-1, 3)
+    out_q, out_e = [], []
+    for start in range(0, len(points), QUERY_CHUNK):
+        chunk = points[start:start + QUERY_CHUNK]
+        qi, ej = index.candidates(chunk, radius)
+        delta = index.positions[ej] - chunk[qi]
+        if index.box is not None:
+            minimum_image(delta, index.box)
+        close = np.einsum('ij,ij->i', delta, delta) < radius * radius
+        out_q.append(qi[close] + start)
+        out_e.append(ej[close])
+
+    if not out_q:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(out_q), np.concatenate(out_e)
+
+
+def is_clustered(positions, radius):
+    """True when a uniform grid of `radius` cells would be badly unbalanced."""
+    if len(positions) == 0:
+        return False
+    _, occupancy = np.unique(np.floor(positions / radius).astype(np.int64),
+                             axis=0, return_counts=True)
+    return occupancy.max() > CLUSTERING_RATIO * occupancy.mean()
+
+
+def build_neighbor_index(positions, radius, method='auto', box=None):
+    """
+    Creates a neighbour index for `positions`.
+    method: 'cells', 'kdtree' or 'auto' (grid unless the layout is clustered).
+    box: side of a periodic cube centred on the origin (None: open space).
+    """
+    if method == 'auto':
+        method = 'kdtree' if cKDTree is not None and is_clustered(positions, radius) else 'cells'
+
+    if method == 'cells':
+        index = CellList(radius, box)
+    elif method == 'kdtree':
+        index = KDTreeIndex(radius, box=box)
+    else:
+        raise ValueError(f"Unknown neighbor index method: {method}")
+
+    index.build(positions)
+    return index
@@ -0,0 +1,178 @@
+import itertools
+import os
+import weakref
+from multiprocessing import get_context, resource_tracker, shared_memory
+
+import numpy as np
+
+from .laws.law2_gradient import linear_kernel_density_gradient
+from .mesh import ParticleMesh
+from .neighbors import build_neighbor_index
+
+# Targets are cut into blocks of this size whatever the worker count, and
+# every block is evaluated by the same code, so results are bit-for-bit
+# identical for 1, 2 or 32 workers.
+BLOCK_SIZE = 4096
+
+# Per-process state: attached shared memory segments, and the solver state
+# (octree, neighbour index, ...) prepared for the latest dispatch.
+_attached = {}
+_prepared = {}
+
+# Dispatch ids are unique across pools so cached state is never mixed up.
+_generations = itertools.count(1)
+
+
+def _attach(name, shape, dtype):
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _prepare(generation, build):
+    if generation not in _prepared:
+        _prepared.clear()
+        _prepared[generation] = build()
+    return _prepared[generation]
+
+
+def _detach(keep=()):
+    """Closes attached segments not in `keep` (and any state viewing them)."""
+    stale = [name for name in _attached if name not in keep]
+    if stale:
+        _prepared.clear()
+    for name in stale:
+        _attached.pop(name).close()
+
+
+def _run_block(task):
+    """Evaluates one block of targets, writing into the shared output."""
+    kind, generation, specs, params, start, stop = task
+    _detach(keep={spec[0] for spec in specs.values()})
+    arrays = {key: _attach(*spec) for key, spec in specs.items()}
+    pos, mass, rows, out = arrays['pos'], arrays['mass'], arrays['rows'], arrays['out']
+
+    if kind == 'forces':
+        backend, g_const, box = params
+        prepared = _prepare(generation, lambda: backend.prepare(pos, mass, box))
+        out[start:stop] = backend.accelerations(pos, mass, rows[start:stop], g_const,
+                                                prepared, box)
+    else:
+        radius, method, exclude, box = params
+        index = _prepare(generation,
+                         lambda: method and build_neighbor_index(pos, radius, method, box))
+        density, grad = linear_kernel_density_gradient(
+            arrays['points'][start:stop], pos, mass, radius,
+            rows[start:stop] if exclude else None, index or None, box=box)
+        out[start:stop, 0] = density
+        out[start:stop, 1:] = grad
+    return stop - start
+
+
+def _release(pool, segments):
+    if pool is not None:
+        pool.close()
+        pool.join()
+    _detach()
+    for shm in segments.values():
+        shm.close()
+        shm.unlink()
+    segments.clear()
+
+
+class WorkerPool:
+    """
+    Splits force and density evaluation across a pool of processes.
+
+    Particle arrays are copied once per call into shared memory segments
+    that every worker maps directly, so nothing but a few names and
+    solver parameters is pickled. Each worker prepares the solver state
+    (e.g. the Barnes-Hut tree) once per call and then evaluates whole
+    blocks of targets, writing accelerations straight into a shared
+    output array. With workers=1 the same blocks run in-process.
+    """
+    def __init__(self, workers=None, block_size=BLOCK_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self.generation = 0
+        self._segments = {}
+        self._pool = None
+        if self.workers > 1:
+            # Workers must share our resource tracker; one of their own would
+            # unlink the segments when the worker exits.
+            resource_tracker.ensure_running()
+            self._pool = get_context().Pool(self.workers)
+        # Segments and processes are released on close() or garbage collection
+        self._finalizer = weakref.finalize(self, _release, self._pool, self._segments)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _buffer(self, key, data=None, shape=None, dtype=float):
+        """Shared array for `key`, grown as needed and filled from `data`."""
+        if data is not None:
+            data = np.ascontiguousarray(data)
+            shape, dtype = data.shape, data.dtype
+        dtype = np.dtype(dtype)
+        nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+
+        shm = self._segments.get(key)
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = self._segments[key] = shared_memory.SharedMemory(
+                create=True, size=nbytes + nbytes // 2)
+
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        if data is not None:
+            array[...] = data
+        return array, (shm.name, shape, dtype.str)
+
+    def _dispatch(self, kind, specs, params, count):
+        self.generation = next(_generations)
+        tasks = [(kind, self.generation, specs, params, start, min(start + self.block_size, count))
+                 for start in range(0, count, self.block_size)]
+        if self._pool is None:
+            for task in tasks:
+                _run_block(task)
+        else:
+            self._pool.map(_run_block, tasks, chunksize=1)
+
+    def accelerations(self, backend, positions, masses, targets, g_const=1.0, box=None):
+        targets = np.asarray(targets, dtype=np.int64)
+        if isinstance(backend, ParticleMesh) or len(targets) == 0:
+            # The mesh cost is the FFT itself; splitting targets gains nothing
+            return backend.accelerations(positions, masses, targets, g_const, box=box)
+
+        specs = {}
+        _, specs['pos'] = self._buffer('pos', positions)
+        _, specs['mass'] = self._buffer('mass', masses)
+        _, specs['rows'] = self._buffer('rows', targets)
+        out, specs['out'] = self._buffer('out', shape=(len(targets), 3))
+        self._dispatch('forces', specs, (backend, g_const, box), len(targets))
+        return out.copy()
+
+    def density_gradient(self, positions, masses, points, radius, exclude=None, method=None,
+                         box=None):
+        """Parallel linear_kernel_density_gradient; `method` picks the neighbour index."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        specs = {}
+        _, specs['pos'] = self._buffer('pos', positions)
+        _, specs['mass'] = self._buffer('mass', masses)
+        _, specs['points'] = self._buffer('points', points)
+        rows = np.full(len(points), -1) if exclude is None else exclude
+        _, specs['rows'] = self._buffer('rows', np.asarray(rows, dtype=np.int64))
+        out, specs['out'] = self._buffer('out', shape=(len(points), 4))
+        if len(points):
+            self._dispatch('density', specs, (radius, method, exclude is not None, box),
+                           len(points))
+        return out[:, 0].copy(), out[:, 1:].copy()
+
+    def close(self):
+        self._finalizer()
+        self._pool = None
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def wrap_positions(positions, box):
+    """
+    Wraps positions (in place) into the periodic cube [-box/2, box/2)^3.
+    Returns: positions
+    """
+    half = 0.5 * box
+    positions -= box * np.floor((positions + half) / box)
+    # Rounding can land a coordinate just below -box/2 exactly on +box/2
+    positions[positions >= half] -= box
+    return positions
+
+
+def minimum_image(delta, box):
+    """
+    Replaces separations (in place) by their nearest periodic image, so
+    every component lies in [-box/2, box/2].
+    Returns: delta
+    """
+    delta -= box * np.rint(delta / box)
+    return delta
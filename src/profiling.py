@@ -0,0 +1,175 @@
+import json
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class _Phase:
+    """Context manager timing one entry into a profiler phase."""
+    __slots__ = ('profiler', 'name', 'start', 'child')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.child = 0.0
+        self.profiler._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        profiler._stack.pop()
+        if profiler._stack:
+            profiler._stack[-1].child += elapsed
+        timer = profiler.timers.get(self.name)
+        if timer is None:
+            timer = profiler.timers[self.name] = [0, 0.0, 0.0]
+        timer[0] += 1
+        timer[1] += elapsed
+        timer[2] += elapsed - self.child
+        profiler.last_step[self.name] = profiler.last_step.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfiler:
+    """Profiling switched off: every hook is a no-op."""
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, amount=1):
+        pass
+
+    def end_step(self, simulation):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """
+    Per-phase instrumentation for a QGU_System and its Simulation.
+
+    Phases ('step', 'integration', 'density', 'forces', 'output',
+    'checkpoint', ...) nest: each keeps its call count, total (inclusive)
+    time and self time (minus the phases entered inside it), so the self
+    times add up to the wall time spent in profiled code. Counters tally
+    work done (steps, force and density pair interactions, neighbour index
+    rebuilds). Callbacks registered with on_step() get (simulation,
+    profiler) after every step, with last_step holding that step's phase
+    times.
+
+    Enable with system.set_profiler(); the default NULL_PROFILER makes every
+    hook a no-op. Pair counts cover in-process evaluation only (work done
+    by a WorkerPool is timed but not counted).
+    """
+    enabled = True
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.callbacks = []
+        self.reset()
+        self._tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    def reset(self):
+        self.timers = {}      # name -> [calls, total seconds, self seconds]
+        self.counters = {}
+        self.last_step = {}
+        self._stack = []
+        self._started = time.perf_counter()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def close(self):
+        """Stops the memory tracing this profiler started (tracing slows every allocation)."""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def phase(self, name):
+        """with profiler.phase('name'): ... times the block."""
+        return _Phase(self, name)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def on_step(self, callback):
+        """Calls callback(simulation, profiler) at the end of every step."""
+        self.callbacks.append(callback)
+        return callback
+
+    def end_step(self, simulation):
+        self.count('steps')
+        for callback in self.callbacks:
+            callback(simulation, self)
+        self.last_step = {}
+
+    def peak_memory(self):
+        """Peak resident set size of the process and (if traced) peak Python/numpy allocations, in MB."""
+        memory = {'rss_peak_mb': None, 'traced_peak_mb': None}
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            memory['rss_peak_mb'] = rss / 2 ** 20 if sys.platform == 'darwin' else rss / 1024
+        if self.trace_memory and tracemalloc.is_tracing():
+            memory['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        return memory
+
+    def to_dict(self):
+        return {
+            'wall_seconds': time.perf_counter() - self._started,
+            'phases': {name: {'calls': calls, 'total_seconds': total, 'self_seconds': own}
+                       for name, (calls, total, own) in self.timers.items()},
+            'counters': dict(self.counters),
+            'memory': self.peak_memory(),
+        }
+
+    def to_json(self, path=None):
+        """JSON export of to_dict(); written to `path` if given."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def summary(self):
+        """Human-readable table, phases sorted by self time."""
+        data = self.to_dict()
+        wall = data['wall_seconds']
+        lines = [f"{'phase':<16}{'calls':>9}{'total s':>11}{'self s':>11}{'self %':>8}"]
+        for name, t in sorted(data['phases'].items(), key=lambda kv: -kv[1]['self_seconds']):
+            share = 100 * t['self_seconds'] / wall if wall > 0 else 0.0
+            lines.append(f"{name:<16}{t['calls']:>9}{t['total_seconds']:>11.4f}"
+                         f"{t['self_seconds']:>11.4f}{share:>7.1f}%")
+        lines.append(f"{'wall':<16}{'':>9}{wall:>11.4f}")
+        for name, value in sorted(data['counters'].items()):
+            lines.append(f"{name:<25}{value:>15,}")
+        for name, value in data['memory'].items():
+            if value is not None:
+                lines.append(f"{name:<25}{value:>15.1f}")
+        return '\n'.join(lines)
@@ -1,84 +1,638 @@
 import numpy as np
 
+from .background import BACKGROUND_GRID, BackgroundField
+from .density_cache import (CELLS_PER_RADIUS, DEPOSIT_TOLERANCE, MAX_DENSITY_GRID, DensityCache,
+                            density_grid_size)
+from .gravity import make_force_backend
+from .laws.law2_gradient import linear_kernel_density_gradient
+from .memory import MEAN_NEIGHBORS, MEMORY_BUDGET, check_budget, estimate_memory
+from .neighbors import INDEX_MIN_ENTITIES, build_neighbor_index
+from .parallel import WorkerPool
+from .periodic import wrap_positions
+from .profiling import NULL_PROFILER, Profiler
+
+# Storage grows by at least this many rows (or 50%, whichever is larger)
+# so that repeated add_entity calls stay amortized O(1).
+GROWTH_CHUNK = 1024
+
+
 class QGU_Entity:
     """
     The fundamental unit of the QGU framework.
     Represents a discrete entity interacting via emergent rules.
+
+    An entity is a lightweight view onto one row of its system's arrays:
+    reading or assigning pos/vel/acc touches the shared storage directly.
     """
+    __slots__ = ('id', '_row', '_system')
+
     def __init__(self, idx, pos, mass=1.0, fixed=False):
+        # Detached entity (e.g. a density probe): back it by a private one-row system
+        system = QGU_System(num_particles=1)
+        row = system._append(np.asarray(pos, dtype=float).reshape(1, 3), mass, fixed)
         self.id = idx
-        self.pos = np.array(pos, dtype=float)
-        self.vel = np.zeros(3)
-        self.acc = np.zeros(3)
-        self.mass = mass
-        self.fixed = fixed
-        self.local_density = 0.0
-        self.time_dilation_factor = 1.0
+        self._row = row.start
+        self._system = system
+
+    @classmethod
+    def _view(cls, system, row):
+        entity = cls.__new__(cls)
+        entity.id = row
+        entity._row = row
+        entity._system = system
+        return entity
+
+    @property
+    def pos(self):
+        return self._system._pos[self._row]
+
+    @pos.setter
+    def pos(self, value):
+        self._system._pos[self._row] = value
+        self._system.mark_moved()
+
+    @property
+    def vel(self):
+        return self._system._vel[self._row]
+
+    @vel.setter
+    def vel(self, value):
+        self._system._vel[self._row] = value
+
+    @property
+    def acc(self):
+        return self._system._acc[self._row]
+
+    @acc.setter
+    def acc(self, value):
+        self._system._acc[self._row] = value
+
+    @property
+    def mass(self):
+        return float(self._system._mass[self._row])
+
+    @mass.setter
+    def mass(self, value):
+        self._system._mass[self._row] = value
+        self._system.mark_moved()
+
+    @property
+    def fixed(self):
+        return bool(self._system._fixed[self._row])
+
+    @fixed.setter
+    def fixed(self, value):
+        self._system._fixed[self._row] = value
+
+    @property
+    def local_density(self):
+        return float(self._system._local_density[self._row])
+
+    @local_density.setter
+    def local_density(self, value):
+        self._system._local_density[self._row] = value
+
+    @property
+    def time_dilation_factor(self):
+        return float(self._system._time_dilation[self._row])
+
+    @time_dilation_factor.setter
+    def time_dilation_factor(self, value):
+        self._system._time_dilation[self._row] = value
 
     def update_state(self, dt=0.1):
         """Updates position based on velocity and computed time dilation."""
         if self.fixed: return
-        
+
         # Apply Law-1: Effective dt depends on density
         # Time flows slower in high density
         effective_dt = dt * self.time_dilation_factor
-        
-        self.vel += self.acc * effective_dt
-        self.pos += self.vel * effective_dt
-        
-        # Reset acceleration for next frame
-        self.acc = np.zeros(3)
+
+        vel = self.vel
+        vel += self.acc * effective_dt
+        self.pos += vel * effective_dt
+
+        # Reset acceleration for next frame (in place, no new array)
+        self.acc[:] = 0.0
 
 class QGU_System:
     """
     Manages the collection of QGU entities and physics interactions.
+
+    State is held as contiguous columns (N x 3 pos/vel/acc plus per-entity
+    mass, fixed flag, local density and time dilation) so that whole-system
+    updates are single array operations. `num_particles` is only a capacity
+    hint; storage grows as entities are added.
+
+    Cutoff-radius density queries go through a neighbour index
+    (`neighbor_method`: 'auto', 'cells', 'kdtree', or None for all-pairs)
+    that is kept across steps and re-synced lazily before each query.
+    Gravity for step() comes from a pluggable force backend (see
+    src/gravity.py), exact direct sum by default. set_workers() spreads
+    force and density evaluation over a process pool, and set_profiler()
+    turns on per-phase timers and counters (see src/profiling.py).
+
+    `dtype` sets the storage precision of the per-entity columns (masses
+    stay float64): float32 halves the state and the pair temporaries of
+    the kernels, which still accumulate sums in float64. With a
+    `memory_budget` (bytes or e.g. '8G'; default from QGU_MEMORY_BUDGET)
+    growth that the estimator (see src/memory.py) puts over the budget
+    raises MemoryError before anything is allocated.
+
+    With periodic=True space is a torus: the cube [-space_size,
+    space_size)^3. Positions are wrapped back into it after every move,
+    and forces, densities and neighbour searches all use the nearest
+    periodic image of each entity (the mesh backend solves on a periodic
+    FFT grid spanning the box).
+
+    set_background() lets the fixed entities pull through a precomputed
+    field (see src/background.py): their gravity is tabulated once and
+    interpolated, and only pairs of moving entities are summed each step.
+    The field is rebuilt whenever the fixed entities, the force law or the
+    box change. Law-2 densities stay exact neighbour sums over everybody.
+
+    set_density_cache() answers density() queries (Law-1 dilation, local
+    density probes) from a grid the entities' kernels are deposited on
+    (see src/density_cache.py), so repeated probes are O(1) lookups. Only
+    entities that moved beyond a tolerance are re-deposited, once per
+    mark_moved(). Gradients always come from exact neighbour sums.
     """
-    def __init__(self, num_particles=100, space_size=20):
-        self.entities = []
+    def __init__(self, num_particles=100, space_size=20, neighbor_method='auto',
+                 dtype=np.float64, memory_budget=MEMORY_BUDGET, periodic=False):
         self.space_size = space_size
+        self.periodic = periodic
+        self.dtype = np.dtype(dtype)
+        self.memory_budget = memory_budget
         self.g_const = 1.0
-        
+        self.neighbor_method = neighbor_method
+        self.force_backend = make_force_backend('direct')
+        self.pool = None
+        self.profiler = NULL_PROFILER
+        self.n = 0
+        self._entities = []
+        self._neighbors = None
+        self._neighbors_version = None
+        self.background_grid = None
+        self.background = None
+        self.density_tolerance = None
+        self.density_cells = CELLS_PER_RADIUS
+        self._density_caches = {}
+        self.version = 0
+        if memory_budget is not None:
+            self.plan_memory(num_particles)
+        self._allocate(max(int(num_particles), 1))
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _allocate(self, capacity):
+        old = getattr(self, '_pos', None)
+        n = self.n
+
+        dtype = self.dtype
+        pos = np.zeros((capacity, 3), dtype=dtype)
+        vel = np.zeros((capacity, 3), dtype=dtype)
+        acc = np.zeros((capacity, 3), dtype=dtype)
+        mass = np.zeros(capacity)
+        fixed = np.zeros(capacity, dtype=bool)
+        local_density = np.zeros(capacity, dtype=dtype)
+        time_dilation = np.ones(capacity, dtype=dtype)
+
+        if old is not None:
+            pos[:n] = self._pos[:n]
+            vel[:n] = self._vel[:n]
+            acc[:n] = self._acc[:n]
+            mass[:n] = self._mass[:n]
+            fixed[:n] = self._fixed[:n]
+            local_density[:n] = self._local_density[:n]
+            time_dilation[:n] = self._time_dilation[:n]
+
+        self._pos, self._vel, self._acc = pos, vel, acc
+        self._mass, self._fixed = mass, fixed
+        self._local_density, self._time_dilation = local_density, time_dilation
+
+    @property
+    def capacity(self):
+        return len(self._mass)
+
+    def _append(self, positions, mass, fixed, vel=None):
+        count = len(positions)
+        needed = self.n + count
+        if needed > self.capacity:
+            if self.memory_budget is not None:
+                self.plan_memory(needed)
+            grow = max(GROWTH_CHUNK, self.capacity // 2)
+            self._allocate(max(needed, self.capacity + grow))
+
+        rows = slice(self.n, needed)
+        self._pos[rows] = positions
+        if self.periodic:
+            wrap_positions(self._pos[rows], self.box)
+        self._vel[rows] = 0.0 if vel is None else vel
+        self._acc[rows] = 0.0
+        self._mass[rows] = mass
+        self._fixed[rows] = fixed
+        self._local_density[rows] = 0.0
+        self._time_dilation[rows] = 1.0
+        self.n = needed
+        self.mark_moved()
+        return rows
+
+    # Live views of the populated rows; in-place edits write through.
+    @property
+    def pos(self):
+        return self._pos[:self.n]
+
+    @property
+    def vel(self):
+        return self._vel[:self.n]
+
+    @property
+    def acc(self):
+        return self._acc[:self.n]
+
+    @property
+    def mass(self):
+        return self._mass[:self.n]
+
+    @property
+    def fixed(self):
+        return self._fixed[:self.n]
+
+    @property
+    def local_density(self):
+        return self._local_density[:self.n]
+
+    @property
+    def time_dilation_factor(self):
+        return self._time_dilation[:self.n]
+
+    @property
+    def box(self):
+        """Side of the periodic cube, or None in open space."""
+        return 2.0 * self.space_size if self.periodic else None
+
+    def wrap(self):
+        """Wraps positions back into the periodic box (no-op in open space)."""
+        if self.periodic:
+            wrap_positions(self.pos, self.box)
+
+    @property
+    def entities(self):
+        """Per-entity views, created lazily so bulk-loaded systems stay cheap."""
+        if len(self._entities) < self.n:
+            self._entities.extend(QGU_Entity._view(self, i)
+                                  for i in range(len(self._entities), self.n))
+        return self._entities
+
+    def __len__(self):
+        return self.n
+
+    def __getstate__(self):
+        # Entity views are rebuilt lazily; worker processes are re-spawned
+        state = self.__dict__.copy()
+        state['_entities'] = []
+        pool = state.pop('pool')
+        state['_pool_config'] = None if pool is None else (pool.workers, pool.block_size)
+        state['profiler'] = NULL_PROFILER
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('dtype', state['_pos'].dtype)
+        state.setdefault('memory_budget', None)
+        state.setdefault('periodic', False)
+        state.setdefault('background_grid', None)
+        state.setdefault('background', None)
+        state.setdefault('density_tolerance', None)
+        state.setdefault('density_cells', CELLS_PER_RADIUS)
+        state.setdefault('_density_caches', {})
+        state.setdefault('version', 0)
+        state.setdefault('_neighbors_version', None)
+        config = state.pop('_pool_config')
+        self.__dict__.update(state)
+        self.pool = None
+        if config is not None:
+            self.set_workers(*config)
+
     def add_entity(self, pos, mass=1.0, fixed=False):
-        idx = len(self.entities)
-        entity = QGU_Entity(idx, pos, mass, fixed)
-        self.entities.append(entity)
-        return entity
+        rows = self._append(np.asarray(pos, dtype=float).reshape(1, 3), mass, fixed)
+        return self.entities[rows.start]
+
+    def add_entities(self, positions, mass=1.0, fixed=False, vel=None):
+        """
+        Bulk version of add_entity. `mass`, `fixed` and `vel` may be scalars
+        or per-entity arrays. Returns the indices of the new entities.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        rows = self._append(positions, mass, fixed, vel)
+        return np.arange(rows.start, rows.stop)
+
+    def update_state(self, dt=0.1):
+        """Whole-system version of QGU_Entity.update_state."""
+        moving = ~self.fixed
+        effective_dt = (dt * self.time_dilation_factor[moving])[:, None]
+
+        self.vel[moving] += self.acc[moving] * effective_dt
+        self.pos[moving] += self.vel[moving] * effective_dt
+        self.wrap()
+        self.mark_moved()
+
+        self.acc[:] = 0.0
+
+    def plan_memory(self, n=None, check=True, force_backend=None, mean_neighbors=MEAN_NEIGHBORS):
+        """
+        Estimated footprint of this system at `n` entities (default: now)
+        with its precision, force backend (or `force_backend`), neighbour
+        method and workers, for density queries finding `mean_neighbors`
+        entities each. With check=True a plan over memory_budget raises
+        MemoryError.
+        Returns: dict of bytes per part plus 'total' (see estimate_memory)
+        """
+        n = self.n if n is None else int(n)
+        workers = 0 if self.pool is None else self.pool.workers
+        estimate = estimate_memory(n, self.dtype, force_backend or self.force_backend,
+                                   self.neighbor_method, mean_neighbors, workers,
+                                   self.periodic)
+        if check:
+            check_budget(estimate, self.memory_budget, f"system of {n} entities")
+        return estimate
+
+    def set_workers(self, workers=None, block_size=None):
+        """
+        Evaluates forces and densities on `workers` processes that share the
+        particle arrays (None: all cores). Results are identical for any
+        worker count. set_workers(0) goes back to plain in-process evaluation.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if workers != 0:
+            options = {} if block_size is None else {'block_size': block_size}
+            self.pool = WorkerPool(workers, **options)
+        return self.pool
+
+    def set_profiler(self, profiler=True, trace_memory=False):
+        """
+        Turns instrumentation on (True, or a Profiler to share between
+        systems) or off (False / None). Returns the active profiler.
+        """
+        if profiler is True:
+            profiler = Profiler(trace_memory)
+        self.profiler = profiler or NULL_PROFILER
+        return self.profiler
+
+    def set_background(self, enabled=True, grid_size=BACKGROUND_GRID):
+        """
+        Replaces the pair sums against fixed entities by a field tabulated
+        on grid_size^3 grids and interpolated (False: exact sums again).
+        """
+        self.background_grid = grid_size if enabled else None
+        self.background = None
+        return self._background()
+
+    def _background(self):
+        """The current BackgroundField (rebuilt if stale), or None for exact sums."""
+        if self.background_grid is None:
+            return None
+        rows = np.flatnonzero(self.fixed)
+        if len(rows) == 0 or len(rows) == self.n:
+            return None
+        background = self.background
+        positions, masses = self.pos[rows], self.mass[rows]
+        if background is None or not background.matches(rows, self.n, positions, masses,
+                                                         self.force_backend, self.box):
+            domain = (np.minimum(self.pos.min(axis=0), -self.space_size),
+                      np.maximum(self.pos.max(axis=0), self.space_size))
+            with self.profiler.phase('background'):
+                background = self.background = BackgroundField(
+                    rows, self.n, positions, masses, self.force_backend, domain,
+                    self.background_grid, self.box)
+            self.profiler.count('background_builds')
+        return background
+
+    def set_density_cache(self, enabled=True, tolerance=DEPOSIT_TOLERANCE,
+                          cells_per_radius=CELLS_PER_RADIUS):
+        """
+        Serves density() queries from deposit grids (one per radius), with
+        entities re-deposited once they move `tolerance` grid cells
+        (False: exact sums again). Gradients always use exact sums, and so
+        does any radius whose grid would exceed MAX_DENSITY_GRID per side.
+        """
+        self.density_tolerance = tolerance if enabled else None
+        self.density_cells = cells_per_radius
+        self._density_caches = {}
+
+    def mark_moved(self):
+        """
+        Records that positions or masses were changed in place, so density
+        caches and the neighbour index re-sync on their next query. The integrators call it after
+        every drift; code moving entities by other means must call it too.
+        """
+        self.version += 1
+
+    def _density_cache(self, radius):
+        """
+        The DensityCache for `radius`, synced with the entities, or None
+        (also when the domain needs a grid finer than MAX_DENSITY_GRID).
+        """
+        if self.density_tolerance is None:
+            return None
+        if radius not in self._density_caches:
+            domain = (self.pos.min(axis=0, initial=-self.space_size) - radius,
+                      self.pos.max(axis=0, initial=self.space_size) + radius)
+            size = density_grid_size(radius, domain, self.box, self.density_cells)
+            self._density_caches[radius] = None if size > MAX_DENSITY_GRID else DensityCache(
+                radius, domain, self.density_tolerance, self.box, self.density_cells)
+        cache = self._density_caches[radius]
+        if cache is None:
+            return None
+        if cache.version != self.version:
+            with self.profiler.phase('density_cache'):
+                deposited = cache.update(self.pos, self.mass, self.version)
+            self.profiler.count('density_deposits', deposited)
+        return cache
+
+    def _moving_sources(self, background, rows):
+        """
+        Positions and masses of the moving entities, the only explicit
+        sources next to a background field, and the indices of `rows` among
+        them (fixed rows are appended as massless sources).
+        """
+        positions, masses = self.pos[background.moving], self.mass[background.moving]
+        local = background.rank[rows]
+        extra = np.flatnonzero(local < 0)
+        if len(extra):
+            local[extra] = len(positions) + np.arange(len(extra))
+            positions = np.concatenate([positions, self.pos[rows[extra]]])
+            masses = np.concatenate([masses, np.zeros(len(extra))])
+        return positions, masses, local
+
+    def _index_method(self):
+        method = self.neighbor_method
+        if method is None or (method == 'auto' and self.n < INDEX_MIN_ENTITIES):
+            return None
+        return method
+
+    def neighbor_index(self, radius):
+        """
+        Neighbour index for cutoff `radius`, synced to current positions
+        once per mark_moved(), so repeated queries cost no O(N) work.
+        Returns None when an all-pairs scan is the better choice.
+        """
+        method = self._index_method()
+        if method is None:
+            return None
+
+        index = self._neighbors
+        stale = index is None or index.radius != radius or index.box != self.box
+        rebuilds = 0 if stale else index.rebuilds
+        with self.profiler.phase('neighbors'):
+            if stale:
+                index = self._neighbors = build_neighbor_index(self.pos, radius, method,
+                                                               self.box)
+            elif self._neighbors_version != self.version:
+                index.update(self.pos)
+        self._neighbors_version = self.version
+        self.profiler.count('neighbor_rebuilds', index.rebuilds - rebuilds)
+        return index
+
+    # ------------------------------------------------------------------
+    # Physics
+    # ------------------------------------------------------------------
+    def set_force_backend(self, backend='direct', **options):
+        """
+        Selects the gravity solver used by step(): 'direct' (exact, for
+        validation), 'barnes_hut' (octree, takes opening_angle) or
+        'particle_mesh' (FFT mesh, takes grid_size, alpha and assignment).
+        All take `softening`; a backend instance can also be passed directly.
+        """
+        backend = make_force_backend(backend, **options)
+        if self.memory_budget is not None:
+            self.plan_memory(force_backend=backend)
+        self.force_backend = backend
+        return self.force_backend
+
+    def compute_accelerations(self, targets=None):
+        """
+        Fills acc for every moving entity from the gravity of all entities.
+        With `targets` only those rows are recomputed; the rest are kept.
+        """
+        if targets is None:
+            targets = np.flatnonzero(~self.fixed)
+            self.acc[:] = 0.0
+        targets = np.asarray(targets, dtype=np.int64)
+        positions, masses, sources = self.pos, self.mass, targets
+        background = self._background()
+        if background is not None:
+            positions, masses, sources = self._moving_sources(background, targets)
+
+        profiler = self.profiler
+        with profiler.phase('forces'):
+            if self.pool is not None:
+                acc = self.pool.accelerations(
+                    self.force_backend, positions, masses, sources, self.g_const, self.box)
+            else:
+                acc = self.force_backend.accelerations(
+                    positions, masses, sources, self.g_const, box=self.box)
+                pairs = getattr(self.force_backend, 'pairs', None)
+                if profiler.enabled and pairs is not None:
+                    profiler.count('force_pairs', pairs)
+            if background is not None:
+                acc += self.g_const * background.accelerations(self.pos[targets], targets)
+            self.acc[targets] = acc
+        profiler.count('force_evaluations', len(targets))
+        return self.acc
+
+    def step(self, dt=0.1):
+        """
+        One gravity step: recompute accelerations, then kick and drift every
+        moving entity (Law-1 dilated dt). Unlike update_state, acc is kept
+        so it can be measured after the step.
+        """
+        self.compute_accelerations()
+        moving = ~self.fixed
+        effective_dt = (dt * self.time_dilation_factor[moving])[:, None]
+        self.vel[moving] += self.acc[moving] * effective_dt
+        self.pos[moving] += self.vel[moving] * effective_dt
+        self.wrap()
+        self.mark_moved()
 
     def calculate_gradient_acceleration(self, target_p, radius=5.0):
         """
         LAW 2 CORE: Calculates acceleration based on Density Gradient.
         Returns: Gradient Magnitude, Acceleration Magnitude
         """
-        # 1. Measure Gradient (Change in Density)
-        epsilon = 0.5
-        grad = np.zeros(3)
-        # We need a copy of pos to probe without moving the actual particle
-        original_pos = target_p.pos.copy()
-        
-        # Temporary probe particle for density checks
-        probe = QGU_Entity(-1, original_pos, 0, True)
-
-        for axis in range(3):
-            # Probe +ve direction
-            probe.pos = original_pos.copy()
-            probe.pos[axis] += epsilon
-            d_plus = self._get_local_density(probe, radius)
-            
-            # Probe -ve direction
-            probe.pos = original_pos.copy()
-            probe.pos[axis] -= 2*epsilon
-            d_minus = self._get_local_density(probe, radius)
-            
-            # Central Difference
-            grad[axis] = (d_plus - d_minus) / (2 * epsilon)
-            
-        return np.linalg.norm(grad), np.linalg.norm(target_p.acc)
+        if target_p._system is self:
+            targets = [target_p._row]
+        else:
+            targets = target_p.pos
+        _, grad, _ = self.density_gradient(targets, radius)
+        return np.linalg.norm(grad[0]), np.linalg.norm(target_p.acc)
+
+    def density_gradient(self, targets, radius=5.0):
+        """
+        LAW 2 CORE (batched): density, analytic density gradient and current
+        acceleration magnitude for many targets in one vectorized pass.
+
+        `targets` is either an integer array of entity indices (each entity is
+        left out of its own density) or an (M, 3) array of free positions,
+        which have no acceleration and report NaN for it.
+        Returns: density (M,), gradient (M, 3), acceleration magnitude (M,)
+        """
+        points, exclude = self._query_points(targets)
+        if exclude is None:
+            accel = np.full(len(points), np.nan)
+        else:
+            accel = np.linalg.norm(self.acc[exclude], axis=1)
+
+        with self.profiler.phase('density'):
+            density, grad = self._density(points, exclude, radius)
+        self.profiler.count('density_queries', len(points))
+        return density, grad, accel
+
+    def density(self, targets, radius=5.0):
+        """
+        LAW 1 (batched): density alone at entity indices or free positions
+        (see density_gradient), from the density cache when one is set.
+        Returns: density (M,)
+        """
+        points, exclude = self._query_points(targets)
+        with self.profiler.phase('density'):
+            cache = self._density_cache(radius)
+            if cache is None:
+                density, _ = self._density(points, exclude, radius)
+            else:
+                density, inside = cache.sample(points, exclude)
+                # Points off the grid are summed exactly
+                rest = np.flatnonzero(~inside)
+                if len(rest):
+                    density[rest], _ = self._density(
+                        points[rest], None if exclude is None else exclude[rest], radius)
+        self.profiler.count('density_queries', len(points))
+        return density
+
+    def _query_points(self, targets):
+        """Positions to query and the rows to leave out (None for free positions)."""
+        targets = np.asarray(targets)
+        if np.issubdtype(targets.dtype, np.integer):
+            idx = targets.ravel()
+            return self.pos[idx], idx
+        return targets.reshape(-1, 3).astype(float), None
+
+    def _density(self, points, exclude, radius):
+        """Law-2 density and gradient at `points`, leaving out the `exclude` rows."""
+        if self.pool is not None:
+            return self.pool.density_gradient(
+                self.pos, self.mass, points, radius, exclude, self._index_method(), self.box)
+        profiler = self.profiler
+        stats = {} if profiler.enabled else None
+        density, grad = linear_kernel_density_gradient(
+            points, self.pos, self.mass, radius, exclude, self.neighbor_index(radius), stats,
+            self.box)
+        if stats:
+            profiler.count('density_pairs', stats['pairs'])
+        return density, grad
 
     def _get_local_density(self, target_p, radius):
-        d = 0
-        for p in self.entities:
-            if p.id == target_p.id: continue
-            dist = np.linalg.norm(p.pos - target_p.pos)
-            if dist < radius:
-                d += p.mass * (1 - dist/radius)
-        return d
+        targets = [target_p._row] if target_p._system is self else target_p.pos
+        return float(self.density(targets, radius)[0])
@@ -0,0 +1,124 @@
+import numpy as np
+
+# Gargantua defaults (QGU density units)
+BH_MASS = 5000.0      # QGU Density Mass
+EVENT_HORIZON = 1.5   # Point of No Return
+LIGHT_SPEED = 0.2
+
+# Rays closer than this fraction of the horizon are captured
+CAPTURE_FRACTION = 0.95
+
+# Rays start cyan [Red, Green, Blue]
+START_COLOR = (0.0, 1.0, 1.0)
+
+
+class PhotonTracer:
+    """
+    Vectorized 2D photon tracer around a QGU density well at the origin.
+
+    All rays live in arrays, pos / vel (M, 2), color (M, 3) and trapped (M,),
+    and one step() advances every ray still in flight at once:
+
+        pull   = M_bh / (r^2.5 + 0.1)            (density lensing pull)
+        v     <- c * unit(v + (0 - x) * pull * 1e-3)
+        x     <- x + v
+        color <- shifted towards red by the density impact pull * 3e-4
+
+    Rays inside CAPTURE_FRACTION * horizon are trapped and drop out of the
+    working set, as do rays beyond `max_radius` (if given), so the cost of
+    a step shrinks with the number of rays still travelling.
+    """
+    def __init__(self, y0, x0=-6.0, bh_mass=BH_MASS, horizon=EVENT_HORIZON,
+                 light_speed=LIGHT_SPEED, max_radius=None, dtype=np.float64):
+        y0 = np.asarray(y0, dtype=dtype).ravel()
+        m = len(y0)
+        self.bh_mass = bh_mass
+        self.horizon = horizon
+        self.light_speed = light_speed
+        self.max_radius = max_radius
+
+        self.pos = np.empty((m, 2), dtype=dtype)
+        self.pos[:, 0] = x0
+        self.pos[:, 1] = y0
+        self.vel = np.zeros((m, 2), dtype=dtype)
+        self.vel[:, 0] = light_speed
+        self.color = np.tile(np.asarray(START_COLOR, dtype=dtype), (m, 1))
+        self.trapped = np.zeros(m, dtype=bool)
+        self.active = np.arange(m)
+        self.steps = 0
+
+    def __len__(self):
+        return len(self.pos)
+
+    def step(self):
+        """Advances every ray in flight by one step. Returns: rays still in flight"""
+        rows = self.active
+        pos, vel, color = self.pos[rows], self.vel[rows], self.color[rows]
+
+        # --- CORE QGU CALCS ---
+        dist = np.hypot(pos[:, 0], pos[:, 1])
+        caught = dist < self.horizon * CAPTURE_FRACTION
+        if caught.any():
+            self.trapped[rows[caught]] = True
+            keep = ~caught
+            rows, pos, vel, color, dist = rows[keep], pos[keep], vel[keep], color[keep], dist[keep]
+
+        # Lensing Pull
+        pull = self.bh_mass / (dist ** 2.5 + 0.1)
+        vel -= pos * (pull * 0.001)[:, None]
+        vel *= (self.light_speed / np.hypot(vel[:, 0], vel[:, 1]))[:, None]
+        pos += vel
+
+        # QGU Density Redshift: red up, green down (to orange), blue fades first
+        impact = pull * 0.0003
+        np.minimum(color[:, 0] + impact * 3.0, 1.0, out=color[:, 0])
+        np.maximum(color[:, 1] - impact * 1.0, 0.3, out=color[:, 1])
+        np.maximum(color[:, 2] - impact * 4.0, 0.0, out=color[:, 2])
+
+        self.pos[rows], self.vel[rows], self.color[rows] = pos, vel, color
+        if self.max_radius is not None:
+            rows = rows[np.hypot(pos[:, 0], pos[:, 1]) <= self.max_radius]
+        self.active = rows
+        self.steps += 1
+        return len(rows)
+
+    def run(self, steps, callback=None):
+        """Traces `steps` steps (or until every ray is trapped or gone)."""
+        for _ in range(steps):
+            if self.step() == 0:
+                break
+            if callback is not None:
+                callback(self)
+        return self
+
+
+def accumulate(image, pos, color, extent):
+    """Adds each ray's color into the pixel under it (image is (H, W, 3))."""
+    h, w, _ = image.shape
+    x0, x1, y0, y1 = extent
+    col = ((pos[:, 0] - x0) * (w / (x1 - x0))).astype(np.int64)
+    row = ((y1 - pos[:, 1]) * (h / (y1 - y0))).astype(np.int64)
+    inside = (col >= 0) & (col < w) & (row >= 0) & (row < h)
+    pixel = row[inside] * w + col[inside]
+    for c in range(3):
+        image[..., c] += np.bincount(pixel, weights=color[inside, c], minlength=h * w).reshape(h, w)
+    return image
+
+
+def lensing_image(num_rays=200_000, steps=400, resolution=(1000, 1200),
+                  extent=(-6.0, 6.0, -5.0, 5.0), y_range=(-4.0, 4.0), **tracer_options):
+    """
+    High-resolution lensing render: traces `num_rays` rays and stacks the
+    colored paths of all of them into one (H, W, 3) image, log-scaled to [0, 1].
+    Start points are staggered by up to one step along x so the per-step
+    snapshots fill in continuous paths instead of wavefronts.
+    """
+    x0 = -6.0 - np.random.default_rng(0).uniform(0, tracer_options.get('light_speed', LIGHT_SPEED), num_rays)
+    tracer = PhotonTracer(np.linspace(*y_range, num_rays), x0=x0, dtype=np.float32,
+                          max_radius=2 * np.hypot(*extent[1::2]), **tracer_options)
+    image = np.zeros(resolution + (3,))
+    tracer.run(steps, lambda t: accumulate(image, t.pos[t.active], t.color[t.active], extent))
+
+    image = np.log1p(image)
+    peak = image.max()
+    return image / peak if peak > 0 else image
@@ -0,0 +1,184 @@
+import os
+from multiprocessing import get_context
+
+import numpy as np
+from matplotlib import animation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 (registers the 3d projection)
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+from .ringbuffer import RingBuffer
+from .trajectory import Trajectory
+
+# Gold for the fixed core, cyan for moving particles
+CORE_STYLE = ('#FFD700', 30, 0.6)
+PARTICLE_STYLE = ('#00FFFF', 10, 0.9)
+
+
+class SnapshotRenderer:
+    """
+    Draws position snapshots into one persistent 3D scatter artist.
+
+    The figure, axes and artist are built once; every frame only replaces
+    the scatter offsets, camera angle and title, so nothing is cleared or
+    re-created. Without `fig` an offscreen Agg figure is used (no display
+    needed); pass a pyplot figure to render interactively. With trail > 0
+    the last `trail` drawn positions of every moving entity are kept in a
+    RingBuffer and shown as one line collection.
+    """
+    def __init__(self, fixed, limit=25, fig=None, figsize=(12, 10), dpi=80,
+                 title="QGU 3D Simulation", spin=0.5, trail=0):
+        fixed = np.asarray(fixed, dtype=bool)
+        self.moving = np.flatnonzero(~fixed)
+        self.title = title
+        self.spin = spin
+        self.fig = fig
+        if fig is None:
+            self.fig = Figure(figsize=figsize, dpi=dpi, facecolor='black')
+            FigureCanvasAgg(self.fig)
+        else:
+            self.fig.set_facecolor('black')
+
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.ax.set_facecolor('black')
+        self.ax.grid(False)
+        self.ax.xaxis.pane.fill = False
+        self.ax.yaxis.pane.fill = False
+        self.ax.zaxis.pane.fill = False
+        self.ax.set_xlim(-limit, limit)
+        self.ax.set_ylim(-limit, limit)
+        self.ax.set_zlim(-limit, limit)
+        self.ax.axis('off')
+
+        colors = np.where(fixed, CORE_STYLE[0], PARTICLE_STYLE[0])
+        sizes = np.where(fixed, CORE_STYLE[1], PARTICLE_STYLE[1])
+        alpha = np.where(fixed, CORE_STYLE[2], PARTICLE_STYLE[2])
+        zeros = np.zeros(len(fixed))
+        self.scatter = self.ax.scatter(zeros, zeros, zeros, c=list(colors), s=sizes,
+                                       alpha=alpha, depthshade=True)
+        self.label = self.ax.set_title("", color='white')
+
+        self.history = None
+        if trail > 0:
+            self.history = RingBuffer(len(self.moving), trail, dims=3)
+            self.trails = Line3DCollection([], colors=PARTICLE_STYLE[0], alpha=0.3, linewidths=0.8)
+            self.ax.add_collection(self.trails)
+
+    def draw(self, pos, frame):
+        """Updates the artists for one snapshot (pos is (N, 3))."""
+        self.scatter._offsets3d = (pos[:, 0], pos[:, 1], pos[:, 2])
+        if self.history is not None:
+            self.history.append(pos[self.moving])
+            self.trails.set_segments(self.history.ordered())
+        self.ax.view_init(elev=20, azim=frame * self.spin)
+        self.label.set_text(f"{self.title} | Frame: {frame}")
+
+    def render(self, pos, frame, path=None):
+        """Draws a snapshot offscreen, optionally saving it as an image."""
+        self.draw(pos, frame)
+        self.fig.canvas.draw()
+        if path is not None:
+            self.fig.savefig(path, facecolor=self.fig.get_facecolor())
+
+
+class FrameSink:
+    """
+    Writes rendered frames as a numbered PNG sequence in `out_dir`, or as a
+    video when `video` is a file name (needs ffmpeg).
+    """
+    def __init__(self, renderer, out_dir, video=None, fps=30):
+        self.renderer = renderer
+        self.out_dir = out_dir
+        self.frames = 0
+        os.makedirs(out_dir, exist_ok=True)
+        self._movie = None
+        if video is not None:
+            if not animation.writers.is_available('ffmpeg'):
+                raise RuntimeError("ffmpeg is required to write videos")
+            self._movie = animation.FFMpegWriter(fps=fps)
+            self._movie.setup(renderer.fig, os.path.join(out_dir, video), renderer.fig.dpi)
+
+    def add(self, pos, frame):
+        if self._movie is not None:
+            self.renderer.draw(pos, frame)
+            self._movie.grab_frame(facecolor=self.renderer.fig.get_facecolor())
+        else:
+            self.renderer.render(pos, frame, os.path.join(self.out_dir, f"frame_{frame:06d}.png"))
+        self.frames += 1
+
+    def close(self):
+        if self._movie is not None:
+            self._movie.finish()
+            self._movie = None
+
+
+def _render_loop(queue, fixed, out_dir, video, options):
+    sink = FrameSink(SnapshotRenderer(fixed, **options), out_dir, video)
+    try:
+        for frame, pos in iter(queue.get, None):
+            sink.add(pos, frame)
+    finally:
+        sink.close()
+
+
+class RenderWorker:
+    """
+    Rendering stage for a running Simulation.
+
+    Attach it with sim.record(worker, every=k): every k-th snapshot is
+    copied and handed to the renderer, which by default runs in its own
+    process so the physics loop never waits for matplotlib (background=False
+    renders in-process instead). close() waits for pending frames.
+    """
+    def __init__(self, fixed, out_dir, video=None, background=True, queue_size=8, **options):
+        self.frames = 0
+        self._sink = None
+        self._process = None
+        if background:
+            ctx = get_context()
+            self._queue = ctx.Queue(maxsize=queue_size)
+            self._process = ctx.Process(target=_render_loop, daemon=True,
+                                        args=(self._queue, np.array(fixed), out_dir, video, options))
+            self._process.start()
+        else:
+            self._sink = FrameSink(SnapshotRenderer(fixed, **options), out_dir, video)
+
+    def write_system(self, system, step=0, time=0.0):
+        pos = np.array(system.pos)
+        if self._sink is not None:
+            self._sink.add(pos, step)
+        else:
+            self._queue.put((step, pos))
+        self.frames += 1
+
+    def close(self):
+        if self._sink is not None:
+            self._sink.close()
+        if self._process is not None:
+            self._queue.put(None)
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_trajectory(path, out_dir, fixed=None, every=1, video=None, **options):
+    """
+    Renders every `every`-th frame of a trajectory file offscreen; frames
+    are read lazily so the file may be far larger than memory.
+    Returns: number of frames rendered
+    """
+    traj = Trajectory(path)
+    fixed = np.zeros(traj.n, dtype=bool) if fixed is None else fixed
+    sink = FrameSink(SnapshotRenderer(fixed, **options), out_dir, video)
+    try:
+        for k in range(0, len(traj), every):
+            sink.add(np.asarray(traj.pos[k], dtype=float), int(traj.step[k]))
+    finally:
+        sink.close()
+    return sink.frames
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity history of (particles, dims) snapshots.
+
+    Storage is (particles, 2 * capacity, dims) and every snapshot is written
+    twice, at slot k and k + capacity, so the last `capacity` entries are
+    always one contiguous window. append() is O(particles) per call
+    whatever the history length, and ordered() returns that window as a
+    view (oldest first), ready for LineCollection.set_segments().
+    """
+    def __init__(self, particles, capacity, dims=3, dtype=float):
+        self.capacity = int(capacity)
+        self.data = np.zeros((particles, 2 * self.capacity, dims), dtype=dtype)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, values):
+        """Stores one snapshot (particles, dims), dropping the oldest when full."""
+        self.data[:, self.head] = values
+        self.data[:, self.head + self.capacity] = values
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def ordered(self):
+        """History as a (particles, len, dims) view, oldest entry first."""
+        end = self.head + self.capacity
+        return self.data[:, end - self.count:end]
+
+    def latest(self):
+        return self.data[:, self.head + self.capacity - 1]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
@@ -0,0 +1,224 @@
+import numpy as np
+
+from .laws.law1_time import GAMMA, time_dilation
+from .trajectory import load_checkpoint, save_checkpoint
+
+
+class Simulation:
+    """
+    Vectorized integration engine for a QGU_System.
+
+    Each step is a kick-drift-kick leapfrog over the whole array state.
+    Before every step the local density of each entity is measured and
+    Law-1 turns it into a per-entity time step dt_eff = dt / (1 + gamma*rho),
+    which is stored on the system as local_density / time_dilation_factor.
+    Forces come from the system's force backend (see src/gravity.py);
+    pass `force_backend` plus its options to select one here.
+
+    `boundary`, if given, is called with the system right after each drift
+    (before forces are recomputed) and may change entities in place, e.g.
+    reflect them off a wall; it must not add or remove entities.
+    Periodic systems (QGU_System(periodic=True)) are wrapped automatically.
+
+    record() streams snapshots into outputs such as a TrajectoryWriter or
+    a RenderWorker, and checkpoint() saves full restartable state
+    periodically; resume() reloads it. With system.set_profiler() every
+    step is timed by phase ('integration' = kick/drift, with 'density' and
+    'forces' nested inside, then 'output' and 'checkpoint').
+    """
+    def __init__(self, system, dt=0.1, gamma=GAMMA, density_radius=5.0,
+                 boundary=None, force_backend=None, **backend_options):
+        self.system = system
+        self.dt = dt
+        self.gamma = gamma
+        self.density_radius = density_radius
+        self.boundary = boundary
+        if force_backend is not None:
+            system.set_force_backend(force_backend, **backend_options)
+
+        self.step_count = 0
+        self.time = 0.0
+        self._forces_for = None
+        self._outputs = []
+        self._checkpoint = None
+
+    def __getstate__(self):
+        # Open output files stay with the running process
+        state = self.__dict__.copy()
+        state['_outputs'] = []
+        return state
+
+    @staticmethod
+    def resume(path):
+        """Loads a Simulation saved by checkpoint(); outputs must be re-attached."""
+        return load_checkpoint(path)
+
+    def record(self, writer, every=1):
+        """Passes a snapshot to writer.write_system() every `every` steps."""
+        self._outputs.append((writer, every))
+        return writer
+
+    def checkpoint(self, path, every=100):
+        """Saves the full simulation state to `path` every `every` steps."""
+        self._checkpoint = (path, every)
+
+    def update_time_dilation(self, rows=None):
+        """
+        LAW 1: measures rho for every entity (or just `rows`) and sets its
+        time dilation.
+        """
+        system = self.system
+        rows = np.arange(system.n) if rows is None else rows
+        if self.gamma == 0:
+            system.local_density[rows] = 0.0
+            system.time_dilation_factor[rows] = 1.0
+            return
+
+        density = system.density(rows, self.density_radius)
+        system.local_density[rows] = density
+        system.time_dilation_factor[rows] = time_dilation(density, self.gamma)
+
+    def step(self):
+        profiler = self.system.profiler
+        with profiler.phase('step'):
+            with profiler.phase('integration'):
+                self._advance()
+            self.step_count += 1
+            self.time += self.dt
+
+            with profiler.phase('output'):
+                for writer, every in self._outputs:
+                    if self.step_count % every == 0:
+                        writer.write_system(self.system, self.step_count, self.time)
+            if self._checkpoint is not None and self.step_count % self._checkpoint[1] == 0:
+                with profiler.phase('checkpoint'):
+                    save_checkpoint(self, self._checkpoint[0])
+        profiler.end_step(self)
+
+    def _advance(self):
+        system = self.system
+        # Accelerations carry over from the previous step unless entities were added
+        if self._forces_for != system.n:
+            system.compute_accelerations()
+
+        self.update_time_dilation()
+        moving = ~system.fixed
+        half_dt = (0.5 * self.dt * system.time_dilation_factor[moving])[:, None]
+
+        # Kick - Drift - Kick
+        system.vel[moving] += system.acc[moving] * half_dt
+        system.pos[moving] += system.vel[moving] * (2 * half_dt)
+        system.wrap()
+        if self.boundary is not None:
+            self.boundary(system)
+        system.mark_moved()
+        system.compute_accelerations()
+        system.vel[moving] += system.acc[moving] * half_dt
+
+        self._forces_for = system.n
+
+    def run(self, steps, callback=None, every=1):
+        """Advances `steps` steps, calling callback(sim) every `every` steps."""
+        for _ in range(steps):
+            self.step()
+            if callback is not None and self.step_count % every == 0:
+                callback(self)
+        return self
+
+
+class BlockSimulation(Simulation):
+    """
+    Simulation with hierarchical power-of-two block time steps.
+
+    Every moving entity sits on a rung k and takes steps of dt / 2^k
+    (0 <= k <= max_rung). One call to step() advances the system by dt in
+    2^max_rung substeps; on each substep everybody drifts, but only the
+    entities whose own step ends there (the active rungs) get their forces
+    and density re-evaluated and are kicked (substeps where nobody's step
+    ends are skipped in a single drift). Rungs come from the Law-1
+    dilated step and two accuracy limits,
+
+        dt_i * tdf_i <= eta / sqrt(G * rho_i)          (local dynamical time)
+        dt_i * tdf_i <= eta * sqrt(softening / |a_i|)   (acceleration)
+
+    so dense, strongly accelerated cores run on fine rungs while the sparse
+    outskirts take the full dt. An entity may only move to a coarser rung
+    when the current substep is aligned with that rung's step.
+    """
+    def __init__(self, system, dt=0.1, max_rung=6, eta=0.2, **kwargs):
+        super().__init__(system, dt, **kwargs)
+        self.max_rung = max_rung
+        self.eta = eta
+        self.force_evaluations = 0
+        self.rung = None
+
+    def _softening(self):
+        softening = getattr(self.system.force_backend, 'softening', 0.0)
+        return softening if softening > 0 else 0.1 * self.density_radius
+
+    def choose_rungs(self, rows, substep=0):
+        """Rung for each entity in `rows` ending its step at `substep`."""
+        system = self.system
+        rho = system.local_density[rows]
+        acc = np.linalg.norm(system.acc[rows], axis=1)
+        with np.errstate(divide='ignore'):
+            limit = np.minimum(self.eta / np.sqrt(system.g_const * rho),
+                               self.eta * np.sqrt(self._softening() / acc))
+            wanted = np.log2(self.dt * system.time_dilation_factor[rows] / limit)
+        rung = np.clip(np.ceil(wanted), 0, self.max_rung).astype(np.int64)
+
+        # Coarser rungs only where this substep lines up with their grid
+        aligned = substep % (1 << (self.max_rung - rung)) == 0
+        while not aligned.all():
+            rung = np.where(aligned, rung, rung + 1)
+            aligned = substep % (1 << (self.max_rung - rung)) == 0
+        return rung
+
+    def _start(self):
+        system = self.system
+        moving = np.flatnonzero(~system.fixed)
+        system.compute_accelerations()
+        self.force_evaluations += len(moving)
+        self.update_time_dilation()
+        self.rung = np.zeros(system.n, dtype=np.int64)
+        self.rung[moving] = self.choose_rungs(moving)
+        self._forces_for = system.n
+
+    def _advance(self):
+        system = self.system
+        if self._forces_for != system.n:
+            self._start()
+
+        moving = ~system.fixed
+        substeps = 1 << self.max_rung
+        sub_dt = self.dt / substeps
+        kick_dt = np.zeros(system.n)
+
+        sub = 0
+        while sub < substeps:
+            period = 1 << (self.max_rung - self.rung)
+
+            # Entities starting a step: first half kick
+            starting = np.flatnonzero(moving & (sub % period == 0))
+            kick_dt[starting] = 0.5 * (self.dt / (1 << self.rung[starting])) \
+                * system.time_dilation_factor[starting]
+            system.vel[starting] += system.acc[starting] * kick_dt[starting, None]
+
+            # Everybody drifts up to the next substep where some step ends
+            finest = 1 << (self.max_rung - self.rung[moving].max(initial=0))
+            span = finest - sub % finest
+            system.pos[moving] += system.vel[moving] * \
+                (span * sub_dt * system.time_dilation_factor[moving])[:, None]
+            system.wrap()
+            if self.boundary is not None:
+                self.boundary(system)
+            system.mark_moved()
+            sub += span
+
+            # Entities ending a step: new forces, second half kick, new rung
+            active = np.flatnonzero(moving & (sub % period == 0))
+            system.compute_accelerations(active)
+            self.force_evaluations += len(active)
+            system.vel[active] += system.acc[active] * kick_dt[active, None]
+            self.update_time_dilation(active)
+            self.rung[active] = self.choose_rungs(active, sub)
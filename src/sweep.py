@@ -0,0 +1,136 @@
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import pickle
+from contextlib import nullcontext
+from multiprocessing import get_context
+
+import numpy as np
+
+# Results are stored here (relative to the working directory) by default.
+CACHE_DIR = '.qgu_cache'
+
+# Engine sources that every sweep result depends on.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def expand_grid(grid):
+    """
+    Parameter points for a grid: a dict of name -> values is expanded to
+    its full cartesian product, a list of dicts is used as is.
+    """
+    if isinstance(grid, dict):
+        names = list(grid)
+        return [dict(zip(names, values))
+                for values in itertools.product(*(grid[name] for name in names))]
+    return [dict(point) for point in grid]
+
+
+def _plain(value):
+    """JSON-safe version of a parameter value (numpy scalars, arrays, tuples)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (np.ndarray, tuple, list)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def code_version(func):
+    """Hash of the sweep function's source file plus every engine module."""
+    digest = hashlib.sha256()
+    files = [inspect.getsourcefile(func)]
+    files += sorted(os.path.join(root, name)
+                    for root, _, names in os.walk(SRC_DIR)
+                    for name in names if name.endswith('.py'))
+    for path in files:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def point_key(func, params, version, seed):
+    """Content address of one sweep point."""
+    record = {
+        'function': f"{func.__module__}.{func.__qualname__}",
+        'version': version,
+        'params': {name: _plain(value) for name, value in sorted(params.items())},
+        'seed': seed,
+    }
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+def point_seed(base_seed, params):
+    """Deterministic per-point seed, independent of grid order and workers."""
+    text = json.dumps({name: _plain(v) for name, v in sorted(params.items())}, sort_keys=True)
+    return int.from_bytes(hashlib.sha256(f"{base_seed}:{text}".encode()).digest()[:4], 'little')
+
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key + '.pkl')
+
+
+def _evaluate(job):
+    func, params, seed, path = job
+    np.random.seed(seed)
+    kwargs = dict(params)
+    if 'rng' in inspect.signature(func).parameters:
+        kwargs['rng'] = np.random.default_rng(seed)
+    result = func(**kwargs)
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(result, f)
+        os.replace(tmp, path)  # atomic: readers never see half a file
+    return result
+
+
+def run_sweep(func, grid, workers=None, cache_dir=CACHE_DIR, seed=0, version=None,
+              progress=None):
+    """
+    Evaluates func(**params) for every point of `grid` on a process pool.
+
+    Each point gets its own deterministic seed (the global NumPy RNG is
+    seeded with it, and it is passed as `rng` if func accepts one). Results
+    are pickled into a content-addressed cache keyed by code version,
+    function, parameters and seed, so rerunning a sweep only computes
+    points that are new or whose code changed. `func` must be importable
+    (module level) for the pool. cache_dir=None disables caching.
+
+    `progress`, if given, is called as progress(computed, missing, cached)
+    once the cache has been read and again after every computed point.
+
+    Returns: points (list of dicts), results (same order)
+    """
+    points = expand_grid(grid)
+    version = code_version(func) if version is None else version
+
+    results = [None] * len(points)
+    jobs, missing = [], []
+    for i, params in enumerate(points):
+        s = point_seed(seed, params)
+        path = None
+        if cache_dir is not None:
+            path = _cache_path(cache_dir, point_key(func, params, version, s))
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    results[i] = pickle.load(f)
+                continue
+        jobs.append((func, params, s, path))
+        missing.append(i)
+
+    cached = len(points) - len(missing)
+    if progress is not None:
+        progress(0, len(missing), cached)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    with get_context().Pool(workers) if workers > 1 else nullcontext() as pool:
+        computed = pool.imap(_evaluate, jobs, chunksize=1) if pool else map(_evaluate, jobs)
+        for done, (i, result) in enumerate(zip(missing, computed), 1):
+            results[i] = result
+            if progress is not None:
+                progress(done, len(missing), cached)
+    return points, results
@@ -0,0 +1,168 @@
+import json
+import os
+import pickle
+
+import numpy as np
+
+MAGIC = b'QGUTRAJ1'
+
+# Fixed header size; the JSON description is padded with spaces to fit.
+HEADER_BYTES = 512
+
+# The file grows (and the header frame count is refreshed) this many frames
+# at a time.
+CHUNK_FRAMES = 64
+
+
+def frame_dtype(n, dtype='float32', fields=('pos', 'vel')):
+    """Record layout of one snapshot: step, time, then an (n, 3) block per field."""
+    return np.dtype([('step', '<i8'), ('time', '<f8')] +
+                    [(name, np.dtype(dtype).str, (n, 3)) for name in fields])
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER_BYTES)
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"{path} is not a QGU trajectory")
+    return json.loads(raw[len(MAGIC):].decode())
+
+
+def _write_header(f, header):
+    text = json.dumps(header).encode()
+    if len(MAGIC) + len(text) > HEADER_BYTES:
+        raise ValueError("trajectory header too large")
+    f.seek(0)
+    f.write(MAGIC + text.ljust(HEADER_BYTES - len(MAGIC)))
+
+
+class TrajectoryWriter:
+    """
+    Append-only, memory-mapped snapshot file.
+
+    Layout: a HEADER_BYTES header (magic + JSON with n, dtype, fields,
+    stride and frame count) followed by fixed-size frame records. Space
+    is preallocated CHUNK_FRAMES frames at a time and frames are written
+    straight into the mapping. Use append() to continue an existing file,
+    e.g. after resuming from a checkpoint.
+    """
+    def __init__(self, path, n, dtype='float32', fields=('pos', 'vel'), chunk_frames=CHUNK_FRAMES):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.dtype = frame_dtype(n, dtype, fields)
+        self.header = {'n': int(n), 'dtype': np.dtype(dtype).str, 'fields': list(fields),
+                       'stride': self.dtype.itemsize, 'frames': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            _write_header(f, self.header)
+        self.frames = 0
+        self._map(chunk_frames)
+
+    @classmethod
+    def append(cls, path, chunk_frames=CHUNK_FRAMES):
+        writer = cls.__new__(cls)
+        writer.path = path
+        writer.chunk_frames = chunk_frames
+        writer.header = _read_header(path)
+        writer.dtype = frame_dtype(writer.header['n'], writer.header['dtype'], writer.header['fields'])
+        writer.frames = writer.header['frames']
+        writer._map(writer.frames + chunk_frames)
+        return writer
+
+    def _map(self, capacity):
+        self.capacity = capacity
+        with open(self.path, 'r+b') as f:
+            f.truncate(HEADER_BYTES + capacity * self.dtype.itemsize)
+        self._frames = np.memmap(self.path, dtype=self.dtype, mode='r+',
+                                 offset=HEADER_BYTES, shape=(capacity,))
+
+    def write(self, step, time, **fields):
+        """Appends one snapshot; every field of the header must be given."""
+        if self.frames == self.capacity:
+            self.flush()
+            self._map(self.capacity + self.chunk_frames)
+        record = self._frames[self.frames]
+        record['step'] = step
+        record['time'] = time
+        for name in self.header['fields']:
+            record[name] = fields[name]
+        self.frames += 1
+        if self.frames % self.chunk_frames == 0:
+            self.flush()
+
+    def write_system(self, system, step=0, time=0.0):
+        self.write(step, time, **{name: getattr(system, name) for name in self.header['fields']})
+
+    def truncate(self, step):
+        """Drops every frame recorded after `step` (e.g. beyond a checkpoint)."""
+        recorded = self._frames['step'][:self.frames]
+        self.frames = int(np.searchsorted(recorded, step, side='right'))
+        self.flush()
+
+    def flush(self):
+        self._frames.flush()
+        self.header['frames'] = self.frames
+        with open(self.path, 'r+b') as f:
+            _write_header(f, self.header)
+
+    def close(self):
+        self.flush()
+        del self._frames
+        # Give back the unused preallocated tail
+        with open(self.path, 'r+b') as f:
+            f.truncate(HEADER_BYTES + self.frames * self.dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Trajectory:
+    """
+    Read-only lazy view of a trajectory file. Fields come back as
+    memory-mapped (frames, n, 3) arrays, so only the frames actually
+    touched are read from disk.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.header = _read_header(path)
+        self.n = self.header['n']
+        self.fields = self.header['fields']
+        dtype = frame_dtype(self.n, self.header['dtype'], self.fields)
+        self._frames = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_BYTES,
+                                 shape=(self.header['frames'],))
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, k):
+        return self._frames[k]
+
+    def __getattr__(self, name):
+        if name in ('step', 'time') or name in self.header['fields']:
+            return self._frames[name]
+        raise AttributeError(name)
+
+
+def save_checkpoint(sim, path):
+    """
+    Writes the complete state of a Simulation (system arrays, neighbour
+    index, force backend, step counters) so load_checkpoint() continues
+    bit-for-bit. The file is replaced atomically.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(sim, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,4 @@
+import sys
+import os
+# Add parent directory to path so tests can import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
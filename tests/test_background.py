@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from src.qgu_core import QGU_System
+
+
+def make_system(periodic=False):
+    rng = np.random.default_rng(4)
+    system = QGU_System(space_size=15, periodic=periodic)
+    system.add_entities(rng.normal(8, 2, (400, 3)), mass=2.0, fixed=True)
+    system.add_entities(rng.uniform(-15, 15, (300, 3)), mass=1.0)
+    system.set_force_backend('direct', softening=1.0)
+    return system
+
+
+def relative_error(got, expected):
+    return np.linalg.norm(got - expected, axis=1) / np.linalg.norm(expected, axis=1)
+
+
+# Median and max relative error; periodic fields jump half a box from each
+# fixed entity, which interpolation smears
+BOUNDS = {False: (1e-3, 0.03), True: (0.01, 0.1)}
+
+
+@pytest.mark.parametrize('periodic', [False, True])
+def test_background_matches_exact_sums(periodic):
+    system = make_system(periodic)
+    targets = np.arange(system.n)
+    expected = system.compute_accelerations(targets).copy()
+    density = system.density(targets)
+
+    system.set_background()
+    got = system.compute_accelerations(targets).copy()
+    error = relative_error(got[~system.fixed], expected[~system.fixed])
+    assert np.median(error) < BOUNDS[periodic][0]
+    assert error.max() < BOUNDS[periodic][1]
+
+    # Fixed entities are summed exactly, and densities never see the grids
+    np.testing.assert_allclose(got[system.fixed], expected[system.fixed], rtol=1e-10, atol=1e-12)
+    np.testing.assert_array_equal(system.density(targets), density)
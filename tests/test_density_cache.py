@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.density_cache import MAX_DENSITY_GRID, DensityCache, density_grid_size
+from src.periodic import wrap_positions
+from src.qgu_core import QGU_System
+
+RADIUS = 3.0
+
+
+def make_system(periodic=False):
+    rng = np.random.default_rng(5)
+    system = QGU_System(space_size=15, periodic=periodic)
+    system.add_entities(rng.uniform(-15, 15, (3000, 3)), mass=rng.uniform(1, 3, 3000))
+    system.add_entities(rng.normal(-6, 1.5, (1000, 3)), mass=1.0)
+    if periodic:
+        wrap_positions(system.pos, system.box)
+        system.mark_moved()
+    return system
+
+
+def test_density_without_cache_is_exact():
+    system = make_system()
+    targets = np.arange(0, system.n, 7)
+    np.testing.assert_array_equal(system.density(targets, RADIUS),
+                                  system.density_gradient(targets, RADIUS)[0])
+
+
+@pytest.mark.parametrize('periodic', [False, True])
+def test_cached_density_error(periodic):
+    system = make_system(periodic)
+    # Errors scale with the local density, so the background entities, the
+    # clump and free points are each measured against their own mean
+    groups = [np.arange(3000), np.arange(3000, 4000),
+              np.random.default_rng(6).uniform(-15, 15, (500, 3))]
+    exact = [system.density_gradient(targets, RADIUS)[0] for targets in groups]
+
+    system.set_density_cache()
+    for targets, expected in zip(groups, exact):
+        error = np.abs(system.density(targets, RADIUS) - expected) / expected.mean()
+        assert np.median(error) < 0.03
+        assert np.percentile(error, 95) < 0.08
+
+
+@pytest.mark.parametrize('periodic', [False, True])
+def test_incremental_update_matches_rebuild(periodic):
+    system = make_system(periodic)
+    box = system.box
+    domain = (np.full(3, -20.0), np.full(3, 20.0))
+    cache = DensityCache(RADIUS, domain, box=box)
+    assert cache.update(system.pos, system.mass, version=1) == system.n
+    assert cache.update(system.pos, system.mass, version=1) == 0
+
+    # Move a few entities, change a mass and add new ones
+    rng = np.random.default_rng(7)
+    positions = system.pos.copy()
+    positions[::10] += rng.normal(0, 1.0, positions[::10].shape)
+    masses = system.mass.copy()
+    masses[3] = 10.0
+    positions = np.concatenate([positions, rng.uniform(-15, 15, (50, 3))])
+    masses = np.concatenate([masses, np.ones(50)])
+    if box is not None:
+        wrap_positions(positions, box)
+    assert 0 < cache.update(positions, masses, version=2) < len(positions) // 2
+
+    fresh = DensityCache(RADIUS, domain, box=box)
+    fresh.update(cache.positions, cache.masses)
+    np.testing.assert_allclose(cache.grid.values, fresh.grid.values, rtol=0, atol=1e-10)
+
+
+def test_grid_beyond_cap_falls_back_to_exact_sums():
+    # Cells of a quarter radius across a 30-wide box need 150+ nodes per side
+    system = make_system()
+    radius = 0.8
+    domain = (np.full(3, -15.0 - radius), np.full(3, 15.0 + radius))
+    assert density_grid_size(radius, domain) > MAX_DENSITY_GRID
+    with pytest.raises(ValueError):
+        DensityCache(radius, domain)
+    with pytest.raises(ValueError):
+        DensityCache(radius, None, box=30.0)
+
+    system.set_density_cache()
+    targets = np.arange(0, system.n, 7)
+    np.testing.assert_array_equal(system.density(targets, radius),
+                                  system.density_gradient(targets, radius)[0])
+    assert system._density_caches[radius] is None
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.gravity import BarnesHut, DirectSum
+from src.periodic import wrap_positions
+
+
+@pytest.mark.parametrize('leaf_size', [1, 8])
+def test_barnes_hut_without_opening_is_direct_sum(leaf_size):
+    rng = np.random.default_rng(1)
+    positions = np.concatenate([rng.normal(0, 1, (300, 3)), rng.uniform(-20, 20, (200, 3))])
+    masses = rng.uniform(1, 5, len(positions))
+    targets = np.arange(0, len(positions), 3)
+
+    expected = DirectSum(softening=0.5).accelerations(positions, masses, targets, 0.8)
+    got = BarnesHut(opening_angle=0, softening=0.5, leaf_size=leaf_size).accelerations(
+        positions, masses, targets, 0.8)
+    np.testing.assert_allclose(got, expected, rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize('leaf_size', [1, 8])
+def test_periodic_barnes_hut_without_opening_is_direct_sum(leaf_size):
+    rng = np.random.default_rng(3)
+    box = 30.0
+    positions = np.concatenate([rng.normal(13, 1.5, (200, 3)), rng.uniform(-15, 15, (300, 3))])
+    wrap_positions(positions, box)
+    masses = rng.uniform(1, 5, len(positions))
+    targets = np.arange(0, len(positions), 3)
+
+    expected = DirectSum(softening=0.5).accelerations(positions, masses, targets, box=box)
+    got = BarnesHut(opening_angle=0, softening=0.5, leaf_size=leaf_size).accelerations(
+        positions, masses, targets, box=box)
+    np.testing.assert_allclose(got, expected, rtol=1e-10, atol=1e-12)
+
+
+def test_barnes_hut_error_is_small_at_default_angle():
+    rng = np.random.default_rng(2)
+    positions = rng.normal(0, 5, (2000, 3))
+    masses = rng.uniform(1, 5, len(positions))
+    targets = np.arange(len(positions))
+
+    expected = DirectSum(softening=0.5).accelerations(positions, masses, targets)
+    got = BarnesHut(softening=0.5).accelerations(positions, masses, targets)
+    error = np.linalg.norm(got - expected, axis=1) / np.linalg.norm(expected, axis=1)
+    assert np.median(error) < 0.01
+    assert error.max() < 0.1
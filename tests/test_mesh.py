@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.mesh import ParticleMesh, power_law_kernel
+
+
+def direct_kernel_sum(positions, masses, softening, alpha=1.0):
+    """Exact sum_j m_j grad K(x_i - x_j) over all other entities."""
+    kernel = power_law_kernel(alpha, softening)
+    grad = kernel(positions[:, None, :] - positions[None, :, :])[1] * masses[None, :, None]
+    rows = np.arange(len(positions))
+    grad[rows, rows] = 0.0
+    return grad.sum(axis=1)
+
+
+@pytest.mark.parametrize('assignment', ['cic', 'tsc'])
+def test_mesh_matches_direct_sum_on_smooth_field(assignment):
+    # Softening of a few cells keeps the field smooth on the mesh
+    rng = np.random.default_rng(3)
+    positions = rng.normal(0, 4, (400, 3))
+    masses = rng.uniform(1, 5, len(positions))
+
+    expected = direct_kernel_sum(positions, masses, softening=2.0)
+    mesh = ParticleMesh(grid_size=64, softening=2.0, assignment=assignment)
+    got = mesh.accelerations(positions, masses, np.arange(len(positions)))
+    error = np.linalg.norm(got - expected, axis=1) / np.linalg.norm(expected, axis=1)
+    assert np.median(error) < 0.01
+    assert error.max() < 0.06
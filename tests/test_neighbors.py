@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from src.laws.law2_gradient import linear_kernel_density_gradient
+from src.neighbors import build_neighbor_index
+from src.periodic import wrap_positions
+from src.qgu_core import QGU_System
+
+RADIUS = 2.0
+
+
+def cloud(rng, n=600, half=10.0):
+    """Uniform background plus a tight clump, so both index layouts get exercised."""
+    return np.concatenate([rng.uniform(-half, half, (n, 3)), rng.normal(3.0, 0.5, (n // 4, 3))])
+
+
+@pytest.mark.parametrize('method', ['cells', 'kdtree'])
+def test_index_matches_all_pairs(method):
+    rng = np.random.default_rng(0)
+    positions = cloud(rng)
+    masses = rng.uniform(1, 5, len(positions))
+    index = build_neighbor_index(positions, RADIUS, method)
+
+    for _ in range(2):
+        points = np.concatenate([positions[:50], rng.uniform(-12, 12, (50, 3))])
+        exclude = np.concatenate([np.arange(50), np.full(50, -1)])
+        expected = linear_kernel_density_gradient(points, positions, masses, RADIUS, exclude)
+        got = linear_kernel_density_gradient(points, positions, masses, RADIUS, exclude, index)
+        np.testing.assert_allclose(got[0], expected[0], rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(got[1], expected[1], rtol=1e-12, atol=1e-12)
+
+        # The index must follow the entities after they move
+        positions += rng.normal(0, 0.7, positions.shape)
+        index.update(positions)
+
+
+@pytest.mark.parametrize('box', [12.0, 5.0])
+@pytest.mark.parametrize('method', ['cells', 'kdtree'])
+def test_periodic_index_matches_all_pairs(method, box):
+    rng = np.random.default_rng(1)
+    # Half the entities hug the faces so most pairs wrap around the box
+    positions = rng.uniform(-0.5 * box, 0.5 * box, (400, 3))
+    positions[::2] = np.sign(positions[::2]) * rng.uniform(0.4 * box, 0.5 * box, (200, 3))
+    masses = rng.uniform(1, 5, len(positions))
+    index = build_neighbor_index(positions, RADIUS, method, box)
+
+    for _ in range(2):
+        points = np.concatenate([positions[:50], rng.uniform(-0.5 * box, 0.5 * box, (50, 3))])
+        exclude = np.concatenate([np.arange(50), np.full(50, -1)])
+        expected = linear_kernel_density_gradient(points, positions, masses, RADIUS, exclude,
+                                                  box=box)
+        got = linear_kernel_density_gradient(points, positions, masses, RADIUS, exclude, index,
+                                             box=box)
+        np.testing.assert_allclose(got[0], expected[0], rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(got[1], expected[1], rtol=1e-12, atol=1e-12)
+
+        positions += rng.normal(0, 0.7, positions.shape)
+        positions = wrap_positions(positions, box)
+        index.update(positions)
+
+
+def test_system_index_syncs_once_per_move():
+    rng = np.random.default_rng(2)
+    system = QGU_System(neighbor_method='cells')
+    system.add_entities(cloud(rng))
+    index = system.neighbor_index(RADIUS)
+    calls = []
+    update = index.update
+    index.update = lambda positions: calls.append(1) or update(positions)
+
+    for _ in range(3):
+        assert system.neighbor_index(RADIUS) is index
+    assert calls == []
+
+    system.pos[:10] += 0.5
+    system.mark_moved()
+    system.neighbor_index(RADIUS)
+    system.neighbor_index(RADIUS)
+    assert calls == [1]
+    expected = linear_kernel_density_gradient(system.pos[:10], system.pos, system.mass, RADIUS)
+    got = linear_kernel_density_gradient(system.pos[:10], system.pos, system.mass, RADIUS,
+                                         index=index)
+    np.testing.assert_allclose(got[0], expected[0], rtol=1e-12, atol=1e-12)
+
+
+def test_periodic_cells_query_without_edge_cells():
+    # Regression: a chunk with no point in an edge cell used to crash
+    rng = np.random.default_rng(3)
+    box = 12.0
+    positions = rng.uniform(-0.5 * box, 0.5 * box, (300, 3))
+    masses = rng.uniform(1, 5, len(positions))
+    index = build_neighbor_index(positions, RADIUS, 'cells', box)
+    points = rng.uniform(-3.9, 3.9, (40, 3))
+
+    expected = linear_kernel_density_gradient(points, positions, masses, RADIUS, box=box)
+    got = linear_kernel_density_gradient(points, positions, masses, RADIUS, index=index, box=box)
+    np.testing.assert_allclose(got[0], expected[0], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(got[1], expected[1], rtol=1e-12, atol=1e-12)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from src.gravity import make_force_backend
+from src.parallel import WorkerPool
+
+BLOCK_SIZE = 64
+
+
+@pytest.fixture(scope='module')
+def pools():
+    with WorkerPool(1, block_size=BLOCK_SIZE) as serial, \
+            WorkerPool(3, block_size=BLOCK_SIZE) as parallel:
+        yield serial, parallel
+
+
+@pytest.fixture(scope='module')
+def particles():
+    rng = np.random.default_rng(8)
+    positions = np.concatenate([rng.normal(0, 2, (300, 3)), rng.uniform(-10, 10, (400, 3))])
+    return positions, rng.uniform(1, 5, len(positions))
+
+
+@pytest.mark.parametrize('backend', ['direct', 'barnes_hut'])
+def test_accelerations_do_not_depend_on_worker_count(pools, particles, backend):
+    serial, parallel = pools
+    positions, masses = particles
+    backend = make_force_backend(backend, softening=0.5)
+    targets = np.arange(0, len(positions), 2)
+    np.testing.assert_array_equal(serial.accelerations(backend, positions, masses, targets),
+                                  parallel.accelerations(backend, positions, masses, targets))
+
+
+@pytest.mark.parametrize('method', [None, 'cells', 'kdtree'])
+def test_density_gradient_does_not_depend_on_worker_count(pools, particles, method):
+    serial, parallel = pools
+    positions, masses = particles
+    exclude = np.arange(len(positions))
+    expected = serial.density_gradient(positions, masses, positions, 2.0, exclude, method)
+    got = parallel.density_gradient(positions, masses, positions, 2.0, exclude, method)
+    np.testing.assert_array_equal(got[0], expected[0])
+    np.testing.assert_array_equal(got[1], expected[1])